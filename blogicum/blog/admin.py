@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Category, Comment, Location, Post
+from .search import search_posts
 
 
 @admin.register(Post)
@@ -28,6 +29,16 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = (
         'is_published',
     )
+    search_fields = (
+        'title',
+        'text',
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо LIKE по таблице."""
+        if not search_term:
+            return queryset, False
+        return search_posts(queryset, search_term), False
 
 
 @admin.register(Location)
@@ -0,0 +1,137 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+from blog.models import Comment, Post, User
+
+from .utils import (BATCH_SIZE, comments_after, cursor_paginating,
+                    encode_cursor, get_author_posts, get_feed_posts,
+                    get_published_category, get_visible_posts)
+
+API_COMMENTS_LIMIT = 100
+API_MAX_COMMENTS_LIMIT = 1000
+POST_LIST_FIELDS = (
+    'id',
+    'title',
+    'excerpt',
+    'pub_date',
+    'comment_count',
+    'image',
+    'image_width',
+    'image_height',
+    'author__username',
+    'category__slug',
+    'category__title',
+    'location__name',
+)
+POST_DETAIL_FIELDS = POST_LIST_FIELDS + ('text_html',)
+COMMENT_FIELDS = ('id', 'text_html', 'created_at', 'author__username')
+
+
+def serialize_post(row):
+    """Пост из словаря .values() без создания модели."""
+    image = row.pop('image')
+    row['image'] = Post.image.field.storage.url(image) if image else None
+    row['author'] = row.pop('author__username')
+    row['category'] = {
+        'slug': row.pop('category__slug'),
+        'title': row.pop('category__title'),
+    }
+    row['location'] = row.pop('location__name')
+    row['url'] = reverse('blog:post_detail', args=[row['id']])
+    return row
+
+
+def serialize_comment(row):
+    row['author'] = row.pop('author__username')
+    return row
+
+
+def post_list_response(request, post_list):
+    """Страница постов по курсорам ?after= и ?before=."""
+    page = cursor_paginating(
+        post_list.values(*POST_LIST_FIELDS),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return JsonResponse({
+        'results': [serialize_post(row) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@require_GET
+def posts(request):
+    """Главная лента."""
+    return post_list_response(request, get_feed_posts())
+
+
+@require_GET
+def category_posts(request, category_slug):
+    category = get_published_category(category_slug)
+    return post_list_response(
+        request, get_feed_posts().filter(category=category)
+    )
+
+
+@require_GET
+def profile_posts(request, username):
+    profile = get_object_or_404(User, username=username)
+    return post_list_response(
+        request, get_author_posts(request.user, profile)
+    )
+
+
+@require_GET
+def post_detail(request, post_id):
+    row = get_visible_posts(request.user).filter(pk=post_id).values(
+        *POST_DETAIL_FIELDS
+    ).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(serialize_post(row))
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', API_COMMENTS_LIMIT))
+    except ValueError:
+        return API_COMMENTS_LIMIT
+    return max(1, min(limit, API_MAX_COMMENTS_LIMIT))
+
+
+@require_GET
+def post_comments(request, post_id):
+    """Комментарии поста по курсору (created_at, id).
+    Ответ пишется потоком по мере чтения строк, поэтому
+    большая страница не собирается в памяти целиком."""
+    if not get_visible_posts(request.user).filter(pk=post_id).exists():
+        raise Http404
+    limit = get_limit(request)
+    rows = comments_after(
+        Comment.objects.filter(post_id=post_id),
+        request.GET.get('after'),
+    ).values(*COMMENT_FIELDS)[:limit + 1].iterator(chunk_size=BATCH_SIZE)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+    def stream():
+        yield '{"results": ['
+        last = None
+        for number, row in enumerate(rows):
+            if number == limit:
+                yield '], "next": ' + json.dumps(
+                    encode_cursor(last, 'created_at')
+                ) + '}'
+                return
+            if last is not None:
+                yield ', '
+            yield encoder.encode(serialize_comment(row))
+            last = row
+        yield '], "next": null}'
+
+    return StreamingHttpResponse(stream(), content_type='application/json')
@@ -0,0 +1,93 @@
+import bisect
+from itertools import islice
+from time import monotonic
+
+from django.http import JsonResponse
+
+from blog.models import Category, Location, User
+
+from .cache import get_tag_versions
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_INDEX_TTL = 60
+
+
+class PrefixIndex:
+    """Подписи строк модели в памяти процесса для поиска по префиксу.
+    Подписи отсортированы без учета регистра, поиск идет через bisect.
+    Сигналы модели меняют версию тега в кэше, и индекс перестраивается
+    при следующем обращении. Кэш по умолчанию свой у каждого процесса,
+    поэтому индекс живет не дольше AUTOCOMPLETE_INDEX_TTL секунд:
+    правки из другого процесса видны не позже этого срока."""
+
+    def __init__(self, tag, queryset, label_field):
+        self.tag = tag
+        self.queryset = queryset
+        self.label_field = label_field
+        self.state = (None, [], [], {})
+        self.expires_at = 0
+
+    def refresh(self):
+        """Состояние индекса: версия, ключи, строки (id, подпись)
+        и подписи по id. Меняется одним присваиванием."""
+        version = get_tag_versions([self.tag])[self.tag]
+        if self.state[0] != version or monotonic() >= self.expires_at:
+            entries = sorted(
+                (label.casefold(), pk, label)
+                for pk, label in self.queryset.values_list(
+                    'pk', self.label_field
+                )
+            )
+            rows = [(pk, label) for _, pk, label in entries]
+            self.state = (
+                version,
+                [key for key, _, _ in entries],
+                rows,
+                dict(rows),
+            )
+            self.expires_at = monotonic() + AUTOCOMPLETE_INDEX_TTL
+        return self.state
+
+    def search(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        _, keys, rows, _ = self.refresh()
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(keys, prefix)
+        found = []
+        candidates = zip(islice(keys, start, None), islice(rows, start, None))
+        for key, row in candidates:
+            if len(found) == limit or not key.startswith(prefix):
+                break
+            found.append(row)
+        return found
+
+    def get_label(self, pk):
+        return self.refresh()[3].get(pk)
+
+
+locations = PrefixIndex(
+    'locations', Location.objects.filter(is_published=True), 'name'
+)
+categories = PrefixIndex(
+    'categories', Category.objects.filter(is_published=True), 'title'
+)
+users = PrefixIndex('users', User.objects.filter(is_active=True), 'username')
+CHOICE_INDEXES = {index.queryset.model: index for index in (
+    locations, categories
+)}
+
+
+def autocomplete(index):
+    """Вью с подсказками из индекса по префиксу ?q=."""
+
+    def view(request):
+        return JsonResponse({'results': [
+            {'id': pk, 'text': label}
+            for pk, label in index.search(request.GET.get('q', ''))
+        ]})
+
+    return view
+
+
+location_autocomplete = autocomplete(locations)
+category_autocomplete = autocomplete(categories)
+user_autocomplete = autocomplete(users)
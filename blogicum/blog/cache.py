@@ -0,0 +1,320 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date, quote_etag
+from django.utils.safestring import mark_safe
+
+PAGE_CACHE_TIMEOUT = 60 * 15
+PAGE_KEY_PREFIX = 'blog:page:'
+TAG_KEY_PREFIX = 'blog:tag:'
+TAG_TIME_KEY_PREFIX = 'blog:tag-time:'
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+CARD_KEY_PREFIX = 'blog:card:'
+CARD_TEMPLATE = 'includes/post_card.html'
+COUNT_CACHE_TIMEOUT = 60 * 5
+COUNT_KEY_PREFIX = 'blog:count:'
+VALIDATORS_KEY_PREFIX = 'blog:validators:'
+
+
+def is_cache_enabled():
+    """Сброс тега виден всем процессам, только если кэш общий.
+    С LocMemCache у каждого процесса свои версии тегов, поэтому
+    страницы, карточки, счетчики и валидаторы с ним не кэшируются,
+    если настройка BLOG_CACHE_ALLOW_PROCESS_LOCAL не разрешает этого
+    для единственного процесса."""
+    return (
+        settings.BLOG_CACHE_ALLOW_PROCESS_LOCAL
+        or not isinstance(caches['default'], LocMemCache)
+    )
+
+
+def get_tag_versions(tags):
+    """Текущие версии тегов кэша.
+    Тегу без версии выдается новая, поэтому вытеснение
+    тега из кэша тоже сбрасывает помеченные им страницы."""
+    keys = {TAG_KEY_PREFIX + tag: tag for tag in tags}
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def get_tag_times(tags):
+    """Время последнего сброса каждого из тегов. Если оно неизвестно,
+    например вытеснено из кэша, тег считается сброшенным сейчас."""
+    keys = {TAG_TIME_KEY_PREFIX + tag: tag for tag in tags}
+    times = cache.get_many(keys)
+    now = timezone.now().timestamp()
+    missing = {key: now for key in keys if key not in times}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        times.update(missing)
+    return {keys[key]: moment for key, moment in times.items()}
+
+
+def invalidate_tags(*tags):
+    """Сбрасывает все страницы, помеченные любым из тегов,
+    и запоминает время сброса для Last-Modified."""
+    tags = set(tags)
+    for tag in tags:
+        try:
+            cache.incr(TAG_KEY_PREFIX + tag)
+        except ValueError:
+            pass
+    now = timezone.now().timestamp()
+    cache.set_many(
+        {TAG_TIME_KEY_PREFIX + tag: now for tag in tags}, timeout=None
+    )
+
+
+def invalidate_tags_on_commit(*tags):
+    """Сбрасывает теги сейчас и еще раз после коммита. Страница,
+    собранная до коммита по старым данным, иначе осталась бы
+    в кэше под новой версией тегов."""
+    invalidate_tags(*tags)
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def add_cache_tags(request, *tags):
+    """Помечает кэшируемую страницу тегами."""
+    if hasattr(request, 'cache_tags'):
+        request.cache_tags.update(tags)
+
+
+def post_cache_tags(post):
+    """Теги данных, которые выводятся на странице вместе с постом."""
+    tags = {f'post:{post.pk}', f'author:{post.author_id}'}
+    if post.category_id is not None:
+        tags.add(f'category:{post.category_id}')
+    if post.location_id is not None:
+        tags.add(f'location:{post.location_id}')
+    return tags
+
+
+def post_feed_cache_tags(post):
+    """Теги лент, в которые может попасть пост."""
+    return {
+        'feed',
+        f'post:{post.pk}',
+        f'feed:author:{post.author_id}',
+        f'feed:category:{post.category_id}',
+    }
+
+
+def limit_timeout(timeout, moment):
+    """Таймаут кэша, который истекает не позже moment."""
+    if moment is None:
+        return timeout
+    seconds = math.ceil((moment - timezone.now()).total_seconds())
+    return max(1, min(timeout, seconds))
+
+
+def expire_cache_at(request, moment):
+    """Не дает закэшированной странице и ее валидаторам пережить
+    moment, например время отложенной публикации."""
+    if not hasattr(request, 'cache_tags'):
+        return
+    request.cache_timeout = limit_timeout(get_cache_timeout(request), moment)
+    if moment is not None:
+        request.cache_expires_at = min(
+            filter(None, (getattr(request, 'cache_expires_at', None), moment))
+        )
+
+
+def get_cache_timeout(request):
+    return getattr(request, 'cache_timeout', PAGE_CACHE_TIMEOUT)
+
+
+def add_last_modified(request, *objects):
+    """Учитывает даты изменения выведенных на странице объектов."""
+    if hasattr(request, 'last_modified'):
+        request.last_modified = max(
+            filter(None, (
+                request.last_modified,
+                *(getattr(obj, 'updated_at', None) for obj in objects),
+            )),
+            default=None,
+        )
+
+
+def add_post_cache_tags(request, posts):
+    for post in posts:
+        add_cache_tags(request, *post_cache_tags(post))
+        add_last_modified(request, post, post.category, post.location)
+
+
+def cached_count(queryset, key, tags, expires_at=None):
+    """Число строк queryset из кэша.
+    Значение сбрасывается вместе с тегами ленты и не переживает
+    expires_at — время ближайшей отложенной публикации."""
+    if not is_cache_enabled():
+        return queryset.count()
+    versions = get_tag_versions(tags)
+    cached = cache.get(COUNT_KEY_PREFIX + key)
+    if cached is not None and cached[0] == versions:
+        return cached[1]
+    count = queryset.count()
+    cache.set(
+        COUNT_KEY_PREFIX + key,
+        (versions, count),
+        limit_timeout(COUNT_CACHE_TIMEOUT, expires_at),
+    )
+    return count
+
+
+def render_post_cards(posts):
+    """HTML карточек постов ленты.
+    Карточка берется из кэша, пока не сменилась версия ни одного
+    из ее тегов: поста, счетчика комментариев, автора, категории
+    и местоположения. Рендерятся только промахи."""
+    posts = list(posts)
+    if not is_cache_enabled():
+        return [
+            mark_safe(render_to_string(CARD_TEMPLATE, {'post': post}))
+            for post in posts
+        ]
+    keys = {post.pk: f'{CARD_KEY_PREFIX}{post.pk}' for post in posts}
+    cached = cache.get_many(keys.values())
+    post_tags = {post.pk: post_cache_tags(post) for post in posts}
+    versions = get_tag_versions(set().union(*post_tags.values()))
+    cards = []
+    missed = {}
+    for post in posts:
+        card_versions = {tag: versions[tag] for tag in post_tags[post.pk]}
+        cached_versions, card = cached.get(keys[post.pk], (None, None))
+        if cached_versions != card_versions:
+            card = render_to_string(CARD_TEMPLATE, {'post': post})
+            missed[keys[post.pk]] = (card_versions, card)
+        cards.append(mark_safe(card))
+    if missed:
+        cache.set_many(missed, CARD_CACHE_TIMEOUT)
+    return cards
+
+
+def cache_anonymous_page(view):
+    """Кэширует ответ для анонимных посетителей по пути и query string.
+    Вью помечает страницу тегами через add_cache_tags,
+    а сигналы моделей сбрасывают эти теги при изменениях."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+            or not is_cache_enabled()
+        ):
+            return view(request, *args, **kwargs)
+        key = PAGE_KEY_PREFIX + hashlib.md5(
+            request.get_full_path().encode()
+        ).hexdigest()
+        cached = cache.get(key)
+        if cached is not None:
+            versions, response = cached
+            if get_tag_versions(versions) == versions:
+                return response
+
+        request.cache_tags = set()
+        response = view(request, *args, **kwargs)
+
+        def store(response):
+            if response.status_code == 200 and request.cache_tags:
+                cache.set(
+                    key,
+                    (get_tag_versions(request.cache_tags), response),
+                    get_cache_timeout(request),
+                )
+
+        if getattr(response, 'is_rendered', True):
+            store(response)
+        else:
+            response.add_post_render_callback(store)
+        return response
+
+    return wrapper
+
+
+def get_viewer(request):
+    """Авторизованный зритель и его CSRF-cookie:
+    от нее зависит токен в формах страницы."""
+    if not request.user.is_authenticated:
+        return None
+    return request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+
+
+def get_page_validators(key):
+    """Сохраненные валидаторы, пока не сменилась версия их тегов."""
+    validators = cache.get(key)
+    if validators is None or get_tag_versions(validators[0]) != validators[0]:
+        return None
+    return validators
+
+
+def make_page_validators(request, viewer):
+    """Версии тегов, ETag и Last-Modified страницы.
+    В ETag входит и время ближайшей отложенной публикации:
+    когда пост выходит, теги не меняются, а оно меняется.
+    Last-Modified не раньше последнего сброса тегов страницы:
+    по датам выведенных объектов он ушел бы назад, когда
+    новейший пост удаляют или снимают с публикации."""
+    versions = get_tag_versions(request.cache_tags)
+    expires_at = getattr(request, 'cache_expires_at', None)
+    etag = quote_etag(hashlib.md5(
+        repr((sorted(versions.items()), viewer, expires_at)).encode()
+    ).hexdigest())
+    moments = [*get_tag_times(request.cache_tags).values()]
+    if request.last_modified is not None:
+        moments.append(request.last_modified.timestamp())
+    return versions, etag, math.ceil(max(moments))
+
+
+def conditional_page(view):
+    """ETag и Last-Modified страницы.
+    ETag считается по версиям тегов кэша, которыми вью пометила
+    страницу, Last-Modified — по датам изменения выведенных объектов
+    и времени сброса этих тегов.
+    Валидаторы хранятся по пути и зрителю не дольше таймаута,
+    заданного через expire_cache_at(), поэтому условный запрос
+    к неизменившейся странице получает 304 без запросов к базе."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not is_cache_enabled():
+            return view(request, *args, **kwargs)
+        viewer = get_viewer(request)
+        key = VALIDATORS_KEY_PREFIX + hashlib.md5(
+            repr((request.get_full_path(), viewer)).encode()
+        ).hexdigest()
+        validators = get_page_validators(key)
+        if validators is not None:
+            response = get_conditional_response(
+                request, etag=validators[1], last_modified=validators[2]
+            )
+            if response is not None:
+                return response
+
+        request.cache_tags = set()
+        request.last_modified = None
+        response = view(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if request.cache_tags:
+            validators = make_page_validators(request, viewer)
+            cache.set(key, validators, get_cache_timeout(request))
+        if validators is not None:
+            _, etag, last_modified = validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    return wrapper
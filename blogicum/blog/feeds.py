@@ -0,0 +1,138 @@
+from collections import namedtuple
+
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from blog.models import Category, User
+
+from .cache import (add_cache_tags, add_post_cache_tags, cache_anonymous_page,
+                    conditional_page, expire_cache_at)
+from .utils import FEED_ORDERING, get_next_pub_date, get_post
+
+FEED_ITEMS_TO_SHOW = 20
+
+FeedSource = namedtuple('FeedSource', ('owner', 'posts'))
+
+
+class PostsFeed(Feed):
+    """RSS-лента последних публикаций.
+    Посты выбираются в get_object(): там же ответ помечается тегами
+    кэша, а время его жизни ограничивается ближайшей отложенной
+    публикацией. Описание поста — уже сохраненный text_html."""
+
+    def get_scope(self, request, **kwargs):
+        """Владелец ленты, условие на его посты и тег кэша."""
+        return None, {}, 'feed'
+
+    def get_object(self, request, **kwargs):
+        owner, filters, tag = self.get_scope(request, **kwargs)
+        add_cache_tags(request, tag)
+        expire_cache_at(request, get_next_pub_date(**filters))
+        posts = list(
+            get_post().filter(**filters).defer('text').order_by(
+                *FEED_ORDERING
+            )[:FEED_ITEMS_TO_SHOW]
+        )
+        add_post_cache_tags(request, posts)
+        return FeedSource(owner, posts)
+
+    def title(self, obj):
+        return 'Блогикум'
+
+    def description(self, obj):
+        return 'Новые публикации'
+
+    def link(self, obj):
+        return reverse('blog:index')
+
+    def items(self, obj):
+        return obj.posts
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text_html
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_author_link(self, item):
+        return reverse('blog:profile', args=[item.author.username])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return (item.category.title,)
+
+
+class CategoryPostsFeed(PostsFeed):
+    """Лента публикаций категории."""
+
+    def get_scope(self, request, category_slug):
+        category = get_object_or_404(
+            Category, slug=category_slug, is_published=True
+        )
+        add_cache_tags(request, f'category:{category.pk}')
+        return (
+            category,
+            {'category': category},
+            f'feed:category:{category.pk}',
+        )
+
+    def title(self, obj):
+        return f'Блогикум: {obj.owner.title}'
+
+    def description(self, obj):
+        return obj.owner.description
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=[obj.owner.slug])
+
+
+class AuthorPostsFeed(PostsFeed):
+    """Лента публикаций автора."""
+
+    def get_scope(self, request, username):
+        author = get_object_or_404(User, username=username)
+        add_cache_tags(request, f'author:{author.pk}', 'profiles')
+        return author, {'author': author}, f'feed:author:{author.pk}'
+
+    def title(self, obj):
+        return f'Блогикум: {obj.owner.get_full_name() or obj.owner.username}'
+
+    def description(self, obj):
+        return f'Публикации пользователя {obj.owner.username}'
+
+    def link(self, obj):
+        return reverse('blog:profile', args=[obj.owner.username])
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class PostsAtomFeed(AtomFeedMixin, PostsFeed):
+    pass
+
+
+class CategoryPostsAtomFeed(AtomFeedMixin, CategoryPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
+
+
+def cached_feed(feed):
+    """Вью ленты с кэшем ответа и условным GET."""
+    return conditional_page(cache_anonymous_page(feed))
@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils.safestring import mark_safe
+
+
+class HTMLField(models.TextField):
+    """Текстовое поле с готовым к выводу HTML.
+    Значения из базы помечаются безопасными для шаблонов."""
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return mark_safe(value)
+
+
+class ImageDimensionField(models.PositiveIntegerField):
+    """Размер фото в пикселях, сохраненный при загрузке,
+    чтобы при выводе не открывать файл."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('null', True)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+
+class ImageWidthField(ImageDimensionField):
+    pass
+
+
+class ImageHeightField(ImageDimensionField):
+    pass
+
+
+class DataURIField(models.TextField):
+    """Небольшой файл, встроенный в строку data: URI."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
@@ -1,11 +1,143 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.forms.utils import flatatt
+from django.urls import reverse_lazy
+from django.utils.html import format_html
 
+from . import autocomplete
+from .images import read_image_metadata
 from .models import Comment, Post
 
 User = get_user_model()
 
 
+class AutocompleteWidget(forms.Widget):
+    """Текстовое поле с подсказками вместо <select> со всей таблицей.
+    id выбранной строки уходит в скрытом поле, а его подпись
+    берется из индекса в памяти, а не из базы. Подписи строк,
+    которых нет в индексе, но которые можно оставить в посте,
+    лежат в extra_labels."""
+
+    def __init__(self, index, url, attrs=None):
+        super().__init__(attrs)
+        self.index = index
+        self.url = url
+        self.extra_labels = {}
+
+    def get_label(self, value):
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            return None
+        label = self.index.get_label(pk)
+        return label if label is not None else self.extra_labels.get(pk)
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        attrs.setdefault('id', f'id_{name}')
+        label = self.get_label(value)
+        return format_html(
+            '<input type="hidden" name="{}" value="{}"'
+            ' data-autocomplete-value>'
+            '<input type="text"{} list="{}_options" value="{}"'
+            ' autocomplete="off" data-autocomplete-url="{}">'
+            '<datalist id="{}_options"></datalist>',
+            name,
+            value if label is not None else '',
+            flatatt(attrs),
+            attrs['id'],
+            label or '',
+            self.url,
+            attrs['id'],
+        )
+
+
+class CachedChoiceIterator:
+    """Пустой вариант и строки индекса: (id, подпись) по алфавиту."""
+
+    def __init__(self, field):
+        self.field = field
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        yield from self.field.index.refresh()[2]
+
+    def __len__(self):
+        return (
+            len(self.field.index.refresh()[2])
+            + (self.field.empty_label is not None)
+        )
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """Выбор строки по id из индекса опубликованных строк в памяти
+    процесса. Ни вывод вариантов, ни проверка присланного id
+    не ходят в базу. Кроме строк индекса допустима текущая связь
+    поста, даже если ее сняли с публикации: форма не должна
+    молча обнулять ее или мешать сохранить пост."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.extra_labels = {}
+
+    @property
+    def index(self):
+        return autocomplete.CHOICE_INDEXES[self.queryset.model]
+
+    def allow(self, obj):
+        """Разрешает выбрать obj и подписывает его в виджете."""
+        label = getattr(obj, self.index.label_field)
+        # Поле и виджет копируются поверхностно: словари не общие
+        # с другими формами, только пока их не меняют на месте.
+        self.extra_labels = {**self.extra_labels, obj.pk: label}
+        self.widget.extra_labels = {
+            **self.widget.extra_labels, obj.pk: label
+        }
+
+    def _get_choices(self):
+        if hasattr(self, '_choices'):
+            return self._choices
+        return CachedChoiceIterator(self)
+
+    choices = property(_get_choices, forms.ChoiceField._set_choices)
+
+    def get_label(self, pk):
+        label = self.index.get_label(pk)
+        return label if label is not None else self.extra_labels.get(pk)
+
+    def to_python(self, value):
+        """Строка с id и подписью, остальные поля которой
+        загрузятся из базы при первом обращении к ним."""
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            pk = None
+        label = self.get_label(pk)
+        if label is None:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        model = self.queryset.model
+        values = {model._meta.pk.attname: pk, self.index.label_field: label}
+        return model.from_db(
+            self.queryset.db,
+            list(values),
+            [
+                values[field.attname]
+                for field in model._meta.concrete_fields
+                if field.attname in values
+            ],
+        )
+
+
 class PostForm(forms.ModelForm):
 
     class Meta:
@@ -15,13 +147,43 @@ class PostForm(forms.ModelForm):
             'created_at',
             'author',
         )
+        field_classes = {
+            'location': CachedModelChoiceField,
+            'category': CachedModelChoiceField,
+        }
         widgets = {
             'pub_date': forms.DateTimeInput(
                 format='%d-%m-%y %H:%M:%S',
                 attrs={'type': 'datetime-local'}
-            )
+            ),
+            'location': AutocompleteWidget(
+                autocomplete.locations,
+                reverse_lazy('blog:location_autocomplete'),
+            ),
+            'category': AutocompleteWidget(
+                autocomplete.categories,
+                reverse_lazy('blog:category_autocomplete'),
+            ),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            if not isinstance(field, CachedModelChoiceField):
+                continue
+            pk = getattr(self.instance, f'{name}_id', None)
+            if pk is not None and field.index.get_label(pk) is None:
+                field.allow(getattr(self.instance, name))
+
+    def save(self, commit=True):
+        """Размеры и заглушка нового фото считаются один раз здесь,
+        пока загруженный файл еще в памяти."""
+        if 'image' in self.changed_data:
+            metadata = read_image_metadata(self.cleaned_data['image'])
+            for name, value in metadata.items():
+                setattr(self.instance, name, value)
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
 
@@ -0,0 +1,300 @@
+import os
+import posixpath
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from itertools import islice
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import connection
+from django.utils import timezone
+from PIL import Image, ImageFilter, ImageOps
+
+from blog.models import Post, StoredFile
+
+from .cache import invalidate_tags
+from .utils import BATCH_SIZE
+
+THUMBNAIL_WIDTHS = (320, 640, 1280)
+THUMBNAIL_DIR = 'thumbs'
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+THUMBNAIL_SIZES = '(max-width: 40rem) 100vw, 40rem'
+THUMBNAIL_SRC_WIDTH = 640
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thumbnails')
+
+
+def thumbnail_name(name, width, extension):
+    """Миниатюры лежат в default_storage под именем фото:
+    у одинаковых фото они общие, как и сам файл."""
+    stem, _ = posixpath.splitext(name)
+    return posixpath.join(THUMBNAIL_DIR, f'{stem}-{width}.{extension}')
+
+
+def delete_thumbnails(name):
+    """Удаляет все миниатюры фото. Каталог шарда небольшой,
+    поэтому его просмотр дешевле перебора возможных ширин."""
+    stem, _ = posixpath.splitext(name)
+    directory, prefix = posixpath.split(posixpath.join(THUMBNAIL_DIR, stem))
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        if filename.startswith(f'{prefix}-'):
+            default_storage.delete(posixpath.join(directory, filename))
+
+
+def walk_storage(storage, directory):
+    """Имена файлов каталога хранилища и всех его подкаталогов.
+    Каталоги FileSystemStorage читаются потоком через os.scandir,
+    у других хранилищ в памяти держится листинг текущего каталога."""
+    if isinstance(storage, FileSystemStorage):
+        yield from scan_directory(storage.path(directory), directory)
+        return
+    try:
+        directories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        yield posixpath.join(directory, filename)
+    for subdirectory in directories:
+        yield from walk_storage(
+            storage, posixpath.join(directory, subdirectory)
+        )
+
+
+def scan_directory(path, directory):
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            name = posixpath.join(directory, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_directory(entry.path, name)
+            elif entry.is_file(follow_symlinks=False):
+                yield name
+
+
+def is_expired(name, cutoff):
+    try:
+        return Post.image.field.storage.get_modified_time(name) < cutoff
+    except FileNotFoundError:
+        return True
+
+
+def get_released_images(cutoff, batch_size=BATCH_SIZE):
+    """Очередь на удаление: файлы, последняя ссылка на которые
+    исчезла раньше cutoff. Читается пачками по имени, поэтому
+    удаление строк по ходу не сбивает обход."""
+    released = StoredFile.objects.filter(
+        references=0, released_at__lt=cutoff
+    ).order_by('name').values_list('name', flat=True)
+    last_name = ''
+    while True:
+        batch = list(released.filter(name__gt=last_name)[:batch_size])
+        if not batch:
+            return
+        last_name = batch[-1]
+        for name in batch:
+            if is_expired(name, cutoff):
+                yield name
+
+
+def get_untracked_images(cutoff, batch_size=BATCH_SIZE):
+    """Файлы каталога upload_to без StoredFile и без постов,
+    измененные раньше cutoff: остатки прерванных загрузок
+    и файлы, потерянные в обход сигналов. Имена с диска
+    сверяются с базой пачками по индексам."""
+    storage = Post.image.field.storage
+    names = walk_storage(storage, Post.image.field.upload_to)
+    while True:
+        batch = list(islice(names, batch_size))
+        if not batch:
+            return
+        referenced = set(Post.objects.filter(image__in=batch).values_list(
+            'image', flat=True
+        ))
+        referenced.update(StoredFile.objects.filter(
+            name__in=batch
+        ).values_list('name', flat=True))
+        for name in batch:
+            if name not in referenced and is_expired(name, cutoff):
+                yield name
+
+
+def delete_image(name, cutoff):
+    """Удаляет файл фото и его миниатюры, если на него
+    так и не появилось ссылок. Возвращает удален ли файл."""
+    StoredFile.objects.filter(
+        name=name, references=0, released_at__lt=cutoff
+    ).delete()
+    if (
+        StoredFile.objects.filter(name=name).exists()
+        or Post.objects.filter(image=name).exists()
+        # Повторная загрузка того же фото обновляет время изменения.
+        or not is_expired(name, cutoff)
+    ):
+        return False
+    Post.image.field.storage.delete(name)
+    delete_thumbnails(name)
+    return True
+
+
+def get_thumbnail_widths(original_width):
+    """Ширины миниатюр без увеличения: меньшие ширины
+    из THUMBNAIL_WIDTHS и ширина самого фото, если она меньше
+    наибольшей."""
+    widths = [width for width in THUMBNAIL_WIDTHS if width < original_width]
+    if original_width < THUMBNAIL_WIDTHS[-1]:
+        widths.append(original_width)
+    else:
+        widths.append(THUMBNAIL_WIDTHS[-1])
+    return widths
+
+
+def open_image(file):
+    """Фото в RGB, повернутое по ориентации из EXIF."""
+    return ImageOps.exif_transpose(Image.open(file)).convert('RGB')
+
+
+def get_image_metadata(image):
+    """Поля поста с размерами фото и размытой заглушкой
+    в несколько сотен байт."""
+    placeholder = image.copy()
+    placeholder.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    content = BytesIO()
+    placeholder.filter(ImageFilter.GaussianBlur(1)).save(
+        content, 'WEBP', quality=PLACEHOLDER_QUALITY
+    )
+    return {
+        'image_width': image.width,
+        'image_height': image.height,
+        'image_placeholder': (
+            'data:image/webp;base64,'
+            + b64encode(content.getvalue()).decode()
+        ),
+    }
+
+
+def read_image_metadata(file):
+    """Поля поста для загруженного файла или пустые, если фото нет."""
+    if not file:
+        return {
+            'image_width': None,
+            'image_height': None,
+            'image_placeholder': '',
+        }
+    file.seek(0)
+    metadata = get_image_metadata(open_image(file))
+    file.seek(0)
+    return metadata
+
+
+def generate_thumbnails(name, image):
+    """Пишет миниатюры фото в WebP и JPEG рядом в хранилище.
+    Метаданные исходного файла в миниатюры не попадают.
+    Возвращает ширины миниатюр."""
+    widths = get_thumbnail_widths(image.width)
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        thumbnail = image.resize((width, height), Image.LANCZOS)
+        for extension, (image_format, options) in THUMBNAIL_FORMATS.items():
+            content = BytesIO()
+            thumbnail.save(content, image_format, **options)
+            path = thumbnail_name(name, width, extension)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            default_storage.save(path, ContentFile(content.getvalue()))
+    return widths
+
+
+def process_post_image(name, force=False):
+    """Делает миниатюры и отмечает их у постов с этим фото.
+    Размеры и заглушка записываются и здесь: фото могло попасть
+    в пост в обход PostForm, например через админку.
+    Если у другого поста с тем же фото все уже готово, данные
+    копируются без обработки; force пересоздает миниатюры заново.
+    Если фото не читается, посты продолжают показывать оригинал."""
+    posts = Post.objects.filter(image=name)
+    ready = None if force else posts.exclude(thumbnails='').exclude(
+        image_width=None
+    ).values(
+        'thumbnails', 'image_width', 'image_height', 'image_placeholder'
+    ).first()
+    if ready is not None:
+        post_ids = list(posts.values_list('pk', flat=True))
+        posts.update(updated_at=timezone.now(), **ready)
+        invalidate_tags(*(f'post:{pk}' for pk in post_ids))
+        return
+    try:
+        with Post.image.field.storage.open(name) as file:
+            image = open_image(file)
+        widths = generate_thumbnails(name, image)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return
+    post_ids = list(posts.values_list('pk', flat=True))
+    posts.update(
+        thumbnails=','.join(map(str, widths)),
+        updated_at=timezone.now(),
+        **get_image_metadata(image),
+    )
+    invalidate_tags(*(f'post:{pk}' for pk in post_ids))
+
+
+def run_in_background(name):
+    try:
+        process_post_image(name)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnails(name):
+    """Отправляет фото в фоновый поток, чтобы запрос
+    не ждал обработки изображения."""
+    executor.submit(run_in_background, name)
+
+
+def get_post_image(post):
+    """Данные для <picture> поста без обращения к файлам:
+    адреса миниатюр строятся из имени фото и сохраненных ширин,
+    размеры и заглушка берутся из полей поста."""
+    widths = [int(width) for width in post.thumbnails.split(',') if width]
+    image = {
+        'src': post.image.url,
+        'width': post.image_width,
+        'height': post.image_height,
+        'placeholder': post.image_placeholder,
+    }
+    if not widths:
+        return image
+    srcsets = {
+        extension: ', '.join(
+            default_storage.url(
+                thumbnail_name(post.image.name, width, extension)
+            ) + f' {width}w'
+            for width in widths
+        )
+        for extension in THUMBNAIL_FORMATS
+    }
+    src_width = next(
+        (width for width in widths if width >= THUMBNAIL_SRC_WIDTH),
+        widths[-1],
+    )
+    return {
+        **image,
+        'src': default_storage.url(
+            thumbnail_name(post.image.name, src_width, 'jpg')
+        ),
+        'webp_srcset': srcsets['webp'],
+        'jpeg_srcset': srcsets['jpg'],
+        'sizes': THUMBNAIL_SIZES,
+    }
@@ -0,0 +1,55 @@
+from datetime import timedelta
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.images import delete_image, get_released_images, get_untracked_images
+from blog.models import Post
+
+GRACE_PERIOD_HOURS = 24
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет файлы фото, на которые не ссылается ни один пост: '
+        'сначала очередь освобожденных файлов, затем остальные файлы '
+        'из хранилища.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=GRACE_PERIOD_HOURS,
+            help='Не трогать файлы, измененные или освобожденные позже.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы, которые будут удалены.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        dry_run = options['dry_run']
+        storage = Post.image.field.storage
+        found = 0
+        freed = 0
+        for name in chain(
+            get_released_images(cutoff), get_untracked_images(cutoff)
+        ):
+            try:
+                size = storage.size(name)
+            except FileNotFoundError:
+                size = 0
+            if not dry_run and not delete_image(name, cutoff):
+                continue
+            found += 1
+            freed += size
+            if dry_run or options['verbosity'] > 1:
+                self.stdout.write(f'{name} ({size} Б)')
+        verb = 'Будет удалено' if dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} файлов: {found}, {freed} Б'
+        ))
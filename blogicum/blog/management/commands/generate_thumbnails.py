@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from blog.images import process_post_image
+from blog.models import Post
+from blog.utils import BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Делает миниатюры, размеры и заглушки для фото публикаций, '
+        'у которых их еще нет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать миниатюры для всех фото.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(Q(thumbnails='') | Q(image_width=None))
+        names = posts.order_by('image').values_list(
+            'image', flat=True
+        ).distinct()
+        processed = 0
+        last_name = ''
+        while True:
+            batch = list(names.filter(image__gt=last_name)[:BATCH_SIZE])
+            if not batch:
+                break
+            last_name = batch[-1]
+            for name in batch:
+                process_post_image(name, force=options['all'])
+                processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано фото: {processed}'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.utils import rebuild_comment_count
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у всех публикаций.'
+
+    def handle(self, *args, **options):
+        updated = rebuild_comment_count()
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено публикаций: {updated}')
+        )
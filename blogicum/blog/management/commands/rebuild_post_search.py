@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс публикаций.'
+
+    def handle(self, *args, **options):
+        indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано публикаций: {indexed}'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Comment, Post
+from blog.utils import rebuild_text_html
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново рендерит сохраненный HTML текста '
+        'у публикаций и комментариев.'
+    )
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            updated = rebuild_text_html(model)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: обновлено {updated}'
+            ))
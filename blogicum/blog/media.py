@@ -0,0 +1,160 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+MEDIA_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MEDIA_REVALIDATE_CACHE_CONTROL = 'public, max-age=300, must-revalidate'
+MEDIA_CHUNK_SIZE = 64 * 1024
+CONTENT_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_content_hash(name):
+    """Хеш содержимого из имени файла ContentAddressedStorage
+    или None для миниатюр и старых имен."""
+    stem, _ = posixpath.splitext(posixpath.basename(name))
+    return stem if CONTENT_HASH_RE.match(stem) else None
+
+
+def get_media_etag(name, file_stat):
+    """Сильный ETag файла. У файлов из ContentAddressedStorage
+    это хеш содержимого из имени, у остальных — размер
+    и время изменения с точностью до наносекунд."""
+    content_hash = get_content_hash(name)
+    if content_hash is not None:
+        return quote_etag(content_hash)
+    return quote_etag(hashlib.md5(
+        f'{file_stat.st_size}:{file_stat.st_mtime_ns}:{file_stat.st_ino}'
+        .encode()
+    ).hexdigest())
+
+
+def parse_range(header, size):
+    """(начало, длина) единственного диапазона из Range.
+    None — заголовка нет или он не поддерживается, тогда
+    отдается весь файл; ValueError — диапазон вне файла."""
+    match = RANGE_RE.match(header or '')
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = min(int(last), size)
+        if not length:
+            raise ValueError
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError
+    return start, end - start + 1
+
+
+def is_range_fresh(request, etag, last_modified):
+    """Условие If-Range: диапазон отдается, только если
+    у клиента та же версия файла."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    if_range_date = parse_http_date_safe(if_range)
+    return if_range_date is not None and if_range_date >= last_modified
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(MEDIA_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def make_file_response(request, path, file_stat, etag):
+    """Тело ответа с учетом Range, если передача файла
+    не поручена фронтенд-серверу."""
+    if settings.MEDIA_ACCEL_REDIRECT:
+        relative_path = os.path.relpath(path, settings.MEDIA_ROOT)
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/'
+            + quote(relative_path.replace(os.sep, '/'))
+        )
+        return response
+    if settings.MEDIA_SENDFILE:
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+        return response
+    size = file_stat.st_size
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None or not is_range_fresh(
+        request, etag, int(file_stat.st_mtime)
+    ):
+        response = FileResponse(open(path, 'rb'))
+    else:
+        start, length = byte_range
+        response = StreamingHttpResponse(
+            read_range(path, start, length), status=206
+        )
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{size}'
+        )
+        response['Content-Length'] = length
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Отдает файл из MEDIA_ROOT с кэшем и условным GET.
+    immutable получают только файлы с хешем содержимого в имени:
+    миниатюры и старые имена могут перезаписываться, поэтому
+    их кэш короткий и проверяется заново. Диапазоны Range отдаются
+    частично, а при настроенных MEDIA_ACCEL_REDIRECT или
+    MEDIA_SENDFILE сам файл передает фронтенд-сервер."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404
+    etag = get_media_etag(path, file_stat)
+    last_modified = int(file_stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = make_file_response(request, full_path, file_stat, etag)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    if response.status_code in (200, 206):
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = (
+        MEDIA_CACHE_CONTROL if get_content_hash(path) is not None
+        else MEDIA_REVALIDATE_CACHE_CONTROL
+    )
+    return response
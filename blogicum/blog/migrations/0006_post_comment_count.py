@@ -0,0 +1,45 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_count(apps, schema_editor):
+    Comment = apps.get_model('blog', 'Comment')
+    Post = apps.get_model('blog', 'Post')
+    published_comments = Comment.objects.filter(
+        post=OuterRef('pk'),
+        is_published=True,
+    ).order_by().values('post').annotate(total=Count('pk')).values('total')
+    Post.objects.update(
+        comment_count=Coalesce(Subquery(published_comments), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0005_post_image'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'default_related_name': 'comments', 'ordering': ('created_at',), 'verbose_name': 'Поздравление', 'verbose_name_plural': 'Поздравления'},
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Число опубликованных комментариев к посту.', verbose_name='Количество комментариев'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:30
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 10
+BATCH_SIZE = 500
+
+
+def fill_excerpt(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    for post in Post.objects.only('id', 'text').iterator(BATCH_SIZE):
+        post.excerpt = Truncator(post.text).words(EXCERPT_WORDS, truncate=' …')
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, help_text='Начало текста для карточки в ленте.', verbose_name='Отрывок'),
+        ),
+        migrations.RunPython(fill_excerpt, migrations.RunPython.noop),
+    ]
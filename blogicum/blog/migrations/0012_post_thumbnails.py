@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails',
+            field=models.CharField(blank=True, editable=False, help_text='Ширины готовых миниатюр фото через запятую.', max_length=64, verbose_name='Миниатюры'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:54
+
+import blog.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=blog.fields.ImageHeightField(blank=True, editable=False, null=True, verbose_name='Высота фото'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=blog.fields.DataURIField(blank=True, editable=False, help_text='Размытое фото в несколько пикселей на время загрузки.', verbose_name='Заглушка фото'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=blog.fields.ImageWidthField(blank=True, editable=False, null=True, verbose_name='Ширина фото'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:56
+
+import blog.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_references(apps, schema_editor):
+    """Файлы, загруженные до хранилища по содержимому,
+    тоже получают счетчики ссылок."""
+    Post = apps.get_model('blog', 'Post')
+    StoredFile = apps.get_model('blog', 'StoredFile')
+    rows = Post.objects.exclude(image='').values('image').annotate(
+        references=Count('id')
+    ).order_by()
+    StoredFile.objects.bulk_create(
+        StoredFile(name=row['image'], references=row['references'])
+        for row in rows.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Имя файла')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+            ],
+            options={
+                'verbose_name': 'файл',
+                'verbose_name_plural': 'Файлы',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=blog.storage.ContentAddressedStorage(), upload_to='post_images', verbose_name='Фото'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
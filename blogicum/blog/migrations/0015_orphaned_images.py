@@ -0,0 +1,22 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_stored_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedfile',
+            name='released_at',
+            field=models.DateTimeField(blank=True, help_text='Когда исчезла последняя ссылка на файл.', null=True, verbose_name='Освобожден'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['image'], name='post_image_idx'),
+        ),
+    ]
@@ -1,12 +1,24 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.template.defaultfilters import linebreaksbr
 from django.urls import reverse
+from django.utils.text import Truncator
+
+from .fields import (DataURIField, HTMLField, ImageHeightField,
+                     ImageWidthField)
+from .storage import ContentAddressedStorage
 
 NUMBER_OF_LETTERS_VISIBLE = 21
+EXCERPT_WORDS = 10
 
 User = get_user_model()
 
 
+def make_excerpt(text):
+    """То же, что фильтр truncatewords в карточке поста."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
 class PublishedModel(models.Model):
     """Абстрактная модель.
     Добвляет флаг is_published
@@ -26,7 +38,45 @@ class PublishedModel(models.Model):
         abstract = True
 
 
-class Category(PublishedModel):
+class UpdatedModel(models.Model):
+    """Абстрактная модель.
+    Добавляет дату время изменения updated_at."""
+
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class RenderedTextModel(models.Model):
+    """Абстрактная модель.
+    Хранит готовый к выводу HTML поля text
+    и обновляет его при каждом сохранении текста."""
+
+    text_html = HTMLField(
+        'HTML текста',
+        blank=True,
+        editable=False,
+    )
+
+    class Meta:
+        abstract = True
+
+    def get_text_derived_fields(self):
+        return {'text_html': linebreaksbr(self.text)}
+
+    def save(self, *args, **kwargs):
+        if 'text' not in self.get_deferred_fields():
+            derived_fields = self.get_text_derived_fields()
+            for name, value in derived_fields.items():
+                setattr(self, name, value)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'text' in update_fields:
+                kwargs['update_fields'] = {*update_fields, *derived_fields}
+        super().save(*args, **kwargs)
+
+
+class Category(PublishedModel, UpdatedModel):
     """Модель Категория. Создает в бд
     таблицу с категориями постов."""
 
@@ -50,7 +100,7 @@ class Category(PublishedModel):
         return self.title[:NUMBER_OF_LETTERS_VISIBLE]
 
 
-class Location(PublishedModel):
+class Location(PublishedModel, UpdatedModel):
     """Модель Локация. Создает в бд
     таблицу с местоположениями."""
 
@@ -64,13 +114,37 @@ class Location(PublishedModel):
         return self.name[:NUMBER_OF_LETTERS_VISIBLE]
 
 
-class Post(PublishedModel):
+class Post(PublishedModel, UpdatedModel, RenderedTextModel):
     """Модель Пост. Создает в бд
     таблицу с постами пользователей."""
 
     title = models.CharField('Заголовок', max_length=256)
     text = models.TextField('Текст')
-    image = models.ImageField('Фото', upload_to='post_images', blank=True)
+    excerpt = models.TextField(
+        'Отрывок',
+        blank=True,
+        editable=False,
+        help_text='Начало текста для карточки в ленте.',
+    )
+    image = models.ImageField(
+        'Фото',
+        upload_to='post_images',
+        storage=ContentAddressedStorage(),
+        blank=True,
+    )
+    thumbnails = models.CharField(
+        'Миниатюры',
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text='Ширины готовых миниатюр фото через запятую.',
+    )
+    image_width = ImageWidthField('Ширина фото')
+    image_height = ImageHeightField('Высота фото')
+    image_placeholder = DataURIField(
+        'Заглушка фото',
+        help_text='Размытое фото в несколько пикселей на время загрузки.',
+    )
     pub_date = models.DateTimeField(
         'Дата и время публикации',
         help_text=(
@@ -96,12 +170,41 @@ class Post(PublishedModel):
         null=True,
         verbose_name='Категория',
     )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+        help_text='Число опубликованных комментариев к посту.',
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = "posts"
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+            models.Index(fields=('image',), name='post_image_idx'),
+        )
+
+    def get_text_derived_fields(self):
+        return {
+            **super().get_text_derived_fields(),
+            'excerpt': make_excerpt(self.text),
+        }
 
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'post_id': self.pk})
@@ -110,7 +213,10 @@ class Post(PublishedModel):
         return self.title[:NUMBER_OF_LETTERS_VISIBLE]
 
 
-class Comment(PublishedModel):
+class Comment(PublishedModel, RenderedTextModel):
+    """Комментарий к посту. Своего updated_at нет:
+    его изменения двигают updated_at поста."""
+
     text = models.TextField('Текст комментария')
     post = models.ForeignKey(
         Post,
@@ -123,6 +229,35 @@ class Comment(PublishedModel):
         verbose_name = 'Поздравление'
         verbose_name_plural = 'Поздравления'
         default_related_name = "comments"
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:NUMBER_OF_LETTERS_VISIBLE]
+
+
+class StoredFile(models.Model):
+    """Файл в хранилище с адресацией по содержимому.
+    Одинаковые загрузки делят один файл, а references
+    считает посты, которые на него ссылаются. Файл без ссылок
+    ждет удаления командой collect_orphaned_images."""
+
+    name = models.CharField('Имя файла', max_length=255, unique=True)
+    references = models.PositiveIntegerField('Число ссылок', default=0)
+    released_at = models.DateTimeField(
+        'Освобожден',
+        null=True,
+        blank=True,
+        help_text='Когда исчезла последняя ссылка на файл.',
+    )
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
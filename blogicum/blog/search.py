@@ -0,0 +1,105 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from blog.models import Post
+
+from .utils import BATCH_SIZE
+
+SEARCH_TABLE = 'blog_post_search'
+SEARCH_WORD_RE = re.compile(r'\w+')
+
+
+def has_search_index():
+    """Индекс FTS5 есть только в SQLite,
+    на других базах поиск идет по LIKE."""
+    return connection.vendor == 'sqlite'
+
+
+def make_match_query(text):
+    """Запрос FTS5 из слов пользователя: нужны все слова,
+    последнее ищется как префикс. Операторы FTS5 во вводе
+    не действуют: каждое слово берется в кавычки."""
+    words = SEARCH_WORD_RE.findall(text)
+    if not words:
+        return ''
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def search_posts(posts, text):
+    """Посты из posts, найденные по заголовку и тексту,
+    более релевантные первыми."""
+    query = make_match_query(text)
+    if not query:
+        return posts.none()
+    if not has_search_index():
+        return posts.filter(Q(title__icontains=text) | Q(text__icontains=text))
+    matches = (
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+    )
+    rank = RawSQL(
+        f'SELECT rank FROM {SEARCH_TABLE} '
+        f'WHERE {SEARCH_TABLE} MATCH %s '
+        f'AND rowid = {connection.ops.quote_name(Post._meta.db_table)}.id',
+        [query],
+    )
+    return posts.filter(pk__in=RawSQL(matches, [query])).annotate(
+        search_rank=rank
+    ).order_by('search_rank', '-pub_date', '-id')
+
+
+def index_post(post_id):
+    """Переписывает пост в индексе по его строке в базе."""
+    if not has_search_index():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id]
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE}(rowid, title, text) '
+            f'SELECT id, title, text FROM {Post._meta.db_table} '
+            'WHERE id = %s',
+            [post_id],
+        )
+
+
+def unindex_post(post_id):
+    if not has_search_index():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id]
+        )
+
+
+def rebuild_search_index(batch_size=BATCH_SIZE):
+    """Заново наполняет индекс пачками по id.
+    Строки не проходят через Python, а каждая пачка
+    индексируется отдельно, поэтому память ограничена."""
+    if not has_search_index():
+        return 0
+    indexed = 0
+    last_id = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        while True:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE}(rowid, title, text) '
+                f'SELECT id, title, text FROM {Post._meta.db_table} '
+                'WHERE id > %s ORDER BY id LIMIT %s',
+                [last_id, batch_size],
+            )
+            if cursor.rowcount <= 0:
+                break
+            indexed += cursor.rowcount
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} ORDER BY rowid DESC LIMIT 1'
+            )
+            last_id = cursor.fetchone()[0]
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+    return indexed
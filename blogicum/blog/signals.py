@@ -0,0 +1,156 @@
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .cache import invalidate_tags_on_commit, post_feed_cache_tags
+from .images import schedule_thumbnails
+from .models import Category, Comment, Location, Post, User
+from .search import index_post, unindex_post
+from .utils import (change_comment_count, change_file_references,
+                    touch_post)
+
+
+@receiver(post_init, sender=Comment)
+def remember_counted_post(sender, instance, **kwargs):
+    """Запоминает, в счётчике какого поста учтён комментарий."""
+    if {'post_id', 'is_published'} & instance.get_deferred_fields():
+        instance._counted_post_id = None
+        return
+    instance._counted_post_id = (
+        instance.post_id if instance.is_published else None
+    )
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count_on_save(sender, instance, **kwargs):
+    counted_post_id = instance.post_id if instance.is_published else None
+    tags = (f'post:{instance.post_id}', f'post:{instance._counted_post_id}')
+    if counted_post_id != instance._counted_post_id:
+        change_comment_count(instance._counted_post_id, -1)
+        change_comment_count(counted_post_id, 1)
+        instance._counted_post_id = counted_post_id
+    else:
+        touch_post(counted_post_id)
+    invalidate_tags_on_commit(*tags)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comment_count_on_delete(sender, instance, **kwargs):
+    change_comment_count(instance._counted_post_id, -1)
+    instance._counted_post_id = None
+    invalidate_tags_on_commit(f'post:{instance.post_id}')
+
+
+@receiver(post_init, sender=Post)
+def remember_post_feeds(sender, instance, **kwargs):
+    """Запоминает ленты, в которых пост был до изменения."""
+    if {'author_id', 'category_id'} & instance.get_deferred_fields():
+        instance._feed_cache_tags = set()
+        return
+    instance._feed_cache_tags = post_feed_cache_tags(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    feed_cache_tags = post_feed_cache_tags(instance)
+    invalidate_tags_on_commit(*feed_cache_tags, *instance._feed_cache_tags)
+    instance._feed_cache_tags = feed_cache_tags
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """Держит индекс поиска в актуальном состоянии.
+    queryset.update() идет мимо сигналов: после массовых правок
+    заголовков и текстов нужна команда rebuild_post_search."""
+    if update_fields and not {'title', 'text'} & set(update_fields):
+        return
+    index_post(instance.pk)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_image(sender, instance, **kwargs):
+    """Запоминает фото, для которого сохранены миниатюры."""
+    if 'image' in instance.get_deferred_fields():
+        instance._image_name = None
+        return
+    instance._image_name = instance.image.name
+
+
+def is_image_changed(instance):
+    return (
+        'image' not in instance.get_deferred_fields()
+        and instance.image.name != instance._image_name
+    )
+
+
+@receiver(pre_save, sender=Post)
+def reset_thumbnails(sender, instance, **kwargs):
+    if is_image_changed(instance):
+        instance.thumbnails = ''
+
+
+@receiver(post_save, sender=Post)
+def track_post_image(sender, instance, **kwargs):
+    """Считает ссылки на файлы фото и после коммита
+    отправляет новое фото в фоновую обработку."""
+    if not is_image_changed(instance):
+        return
+    old_name = instance._image_name
+    name = instance._image_name = instance.image.name
+    change_file_references(name, 1)
+    change_file_references(old_name, -1)
+    if name:
+        transaction.on_commit(lambda: schedule_thumbnails(name))
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    """Файл без ссылок удалит collect_orphaned_images
+    по истечении срока ожидания."""
+    if 'image' not in instance.get_deferred_fields():
+        change_file_references(instance.image.name, -1)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+
+
+@receiver(post_init, sender=Category)
+def remember_category_state(sender, instance, **kwargs):
+    if 'is_published' in instance.get_deferred_fields():
+        instance._was_published = None
+        return
+    instance._was_published = instance.is_published
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category_pages(sender, instance, **kwargs):
+    tags = [f'category:{instance.pk}', 'categories']
+    if instance.is_published != instance._was_published:
+        tags += ['feed', 'profiles']
+        instance._was_published = instance.is_published
+    invalidate_tags_on_commit(*tags)
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_deleted_category_pages(sender, instance, **kwargs):
+    invalidate_tags_on_commit(
+        f'category:{instance.pk}', 'categories', 'feed', 'profiles'
+    )
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_pages(sender, instance, **kwargs):
+    invalidate_tags_on_commit(f'location:{instance.pk}', 'locations')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_pages(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_tags_on_commit(f'author:{instance.pk}', 'users')
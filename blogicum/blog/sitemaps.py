@@ -0,0 +1,243 @@
+from abc import ABC, abstractmethod
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.html import escape
+
+from blog.models import Category, User
+
+from .utils import BATCH_SIZE, decode_cursor, get_post, make_cursor
+
+SITEMAP_CHUNK_SIZE = 10000
+SITEMAP_MAX_URLS = 50000
+SITEMAP_CACHE_TIMEOUT = 60 * 60
+SITEMAP_KEY_PREFIX = 'blog:sitemap:'
+SITEMAP_CONTENT_TYPE = 'application/xml'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+class SitemapSection(ABC):
+    """Раздел карты сайта.
+    Строки читаются по возрастанию ключа и режутся на куски
+    по SITEMAP_CHUNK_SIZE. Кусок задается токенами ключа своей
+    первой строки и первой строки следующего куска, поэтому
+    выбирается по индексу без OFFSET и не теряет строки,
+    добавленные после построения индекса."""
+
+    name = None
+
+    @abstractmethod
+    def get_queryset(self):
+        """values_list, упорядоченный по ключу раздела."""
+
+    @abstractmethod
+    def location(self, row):
+        """Адрес страницы строки."""
+
+    def get_token(self, row):
+        return str(row[0])
+
+    def get_key(self, token):
+        """Значение ключа из токена или None для битого токена."""
+        return int(token) if token.isascii() and token.isdigit() else None
+
+    def key_filter(self, key, lookup):
+        return Q(**{f'pk__{lookup}': key})
+
+    def filter_range(self, queryset, start, end):
+        """Строки от start включительно до end. None — токен битый."""
+        for token, lookup in ((start, 'gte'), (end, 'lt')):
+            if token is None:
+                continue
+            key = self.get_key(token)
+            if key is None:
+                return None
+            queryset = queryset.filter(self.key_filter(key, lookup))
+        return queryset
+
+    def lastmod(self, row):
+        return None
+
+
+class PostSection(SitemapSection):
+    name = 'posts'
+
+    def get_queryset(self):
+        return get_post().order_by('pub_date', 'id').values_list(
+            'id', 'pub_date', 'updated_at'
+        )
+
+    def get_token(self, row):
+        return make_cursor(row[1], row[0])
+
+    def get_key(self, token):
+        return decode_cursor(token)
+
+    def key_filter(self, key, lookup):
+        pub_date, pk = key
+        strict_lookup = {'gte': 'gt', 'lt': 'lt'}[lookup]
+        return (
+            Q(**{f'pub_date__{strict_lookup}': pub_date})
+            | Q(pub_date=pub_date, **{f'pk__{lookup}': pk})
+        )
+
+    def location(self, row):
+        return reverse('blog:post_detail', args=[row[0]])
+
+    def lastmod(self, row):
+        return row[2]
+
+
+class CategorySection(SitemapSection):
+    name = 'categories'
+
+    def get_queryset(self):
+        return Category.objects.filter(is_published=True).order_by(
+            'id'
+        ).values_list('id', 'slug', 'updated_at')
+
+    def location(self, row):
+        return reverse('blog:category_posts', args=[row[1]])
+
+    def lastmod(self, row):
+        return row[2]
+
+
+class ProfileSection(SitemapSection):
+    name = 'profiles'
+
+    def get_queryset(self):
+        return User.objects.filter(is_active=True).order_by(
+            'id'
+        ).values_list('id', 'username')
+
+    def location(self, row):
+        return reverse('blog:profile', args=[row[1]])
+
+
+SECTIONS = {
+    section.name: section
+    for section in (PostSection(), CategorySection(), ProfileSection())
+}
+
+
+def cached_stream(key, generate):
+    """XML из кэша или поток, который по ходу собирается в кэш.
+    В памяти держится не больше одного куска карты."""
+    content = cache.get(key)
+    if content is not None:
+        return HttpResponse(content, content_type=SITEMAP_CONTENT_TYPE)
+
+    def stream():
+        parts = []
+        for part in generate():
+            parts.append(part)
+            yield part
+        cache.set(key, ''.join(parts), SITEMAP_CACHE_TIMEOUT)
+
+    return StreamingHttpResponse(stream(), content_type=SITEMAP_CONTENT_TYPE)
+
+
+def get_chunk_bounds(section):
+    """Пары токенов (start, end) кусков раздела. Граница
+    следующего куска ищется отдельным запросом от начала текущего,
+    поэтому строки раздела целиком не читаются."""
+    queryset = section.get_queryset()
+    start = None
+    while True:
+        rows = section.filter_range(queryset, start, None)
+        if start is None and not rows.exists():
+            return
+        row = next(
+            iter(rows[SITEMAP_CHUNK_SIZE:SITEMAP_CHUNK_SIZE + 1]), None
+        )
+        end = None if row is None else section.get_token(row)
+        yield start, end
+        if end is None:
+            return
+        start = end
+
+
+def get_bounds_key(section):
+    return f'{SITEMAP_KEY_PREFIX}bounds:{section.name}'
+
+
+def sitemap_index(request):
+    """Индекс карты сайта со ссылками на куски всех разделов."""
+
+    def generate():
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<sitemapindex xmlns="{SITEMAP_NS}">\n'
+        )
+        for section in SECTIONS.values():
+            bounds = set()
+            for start, end in get_chunk_bounds(section):
+                bounds.add((start, end))
+                url = reverse('blog:sitemap_section', args=[section.name])
+                query = urlencode({
+                    name: token
+                    for name, token in (('start', start), ('end', end))
+                    if token is not None
+                })
+                if query:
+                    url += f'?{query}'
+                location = escape(request.build_absolute_uri(url))
+                yield f'<sitemap><loc>{location}</loc></sitemap>\n'
+            cache.set(
+                get_bounds_key(section), bounds, SITEMAP_CACHE_TIMEOUT
+            )
+        yield '</sitemapindex>\n'
+
+    return cached_stream(
+        f'{SITEMAP_KEY_PREFIX}{request.get_host()}:index', generate
+    )
+
+
+def sitemap_section(request, section):
+    """Кусок раздела карты сайта от токена ?start= до ?end=.
+    Строк в куске не больше SITEMAP_MAX_URLS — предела протокола.
+    Кэшируются только куски, границы которых выдал индекс:
+    подобранные вручную токены не засоряют кэш."""
+    section = SECTIONS.get(section)
+    if section is None:
+        raise Http404
+    start = request.GET.get('start')
+    end = request.GET.get('end')
+    queryset = section.filter_range(section.get_queryset(), start, end)
+    if queryset is None:
+        raise Http404
+
+    def generate():
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<urlset xmlns="{SITEMAP_NS}">\n'
+        )
+        rows = queryset[:SITEMAP_MAX_URLS].iterator(chunk_size=BATCH_SIZE)
+        for row in rows:
+            location = escape(
+                request.build_absolute_uri(section.location(row))
+            )
+            lastmod = section.lastmod(row)
+            yield (
+                f'<url><loc>{location}</loc>'
+                + (
+                    f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+                    if lastmod else ''
+                )
+                + '</url>\n'
+            )
+        yield '</urlset>\n'
+
+    if (start, end) not in cache.get(get_bounds_key(section), ()):
+        return StreamingHttpResponse(
+            generate(), content_type=SITEMAP_CONTENT_TYPE
+        )
+    return cached_stream(
+        f'{SITEMAP_KEY_PREFIX}{request.get_host()}:{section.name}:'
+        f'{start}:{end}',
+        generate,
+    )
@@ -0,0 +1,56 @@
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK_SIZE = 64 * 1024
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла — SHA-256 его содержимого.
+    Каталог из upload_to сохраняется, а внутри него файлы
+    раскладываются по вложенным каталогам из первых знаков хеша:
+    post_images/ab/cd/abcd….jpg. Одинаковые загрузки получают
+    одно имя и хранятся один раз; ссылки на файл считает StoredFile."""
+
+    def get_available_name(self, name, max_length=None):
+        """Имя определяется содержимым в _save(),
+        занятое имя означает тот же файл."""
+        return name
+
+    def get_content_hash(self, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_content_name(self, name, content_hash):
+        directory, filename = posixpath.split(name)
+        _, extension = posixpath.splitext(filename)
+        shards = [
+            content_hash[depth * SHARD_WIDTH:(depth + 1) * SHARD_WIDTH]
+            for depth in range(SHARD_DEPTH)
+        ]
+        return posixpath.join(
+            directory, *shards, content_hash + extension.lower()
+        )
+
+    def _save(self, name, content):
+        """Пишет файл под временным именем и переименовывает его,
+        поэтому параллельная загрузка того же содержимого
+        не видит недописанный файл. У уже сохраненного файла
+        обновляется время изменения: сборщик мусора не удалит
+        его, пока не истечет срок от последней загрузки."""
+        name = self.get_content_name(name, self.get_content_hash(content))
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        temporary_name = super()._save(
+            f'{name}.{uuid.uuid4().hex}.tmp', content
+        )
+        os.replace(self.path(temporary_name), self.path(name))
+        return name
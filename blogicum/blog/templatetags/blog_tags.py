@@ -0,0 +1,22 @@
+from django import template
+
+from blog.cache import render_post_cards
+from blog.images import get_post_image
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Карточки постов страницы ленты из кэша фрагментов."""
+    return render_post_cards(posts)
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post):
+    """Фото поста через <picture> с миниатюрами WebP и JPEG."""
+    return {
+        **get_post_image(post),
+        'original': post.image.url,
+        'alt': post.title,
+    }
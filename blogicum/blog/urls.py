@@ -1,6 +1,6 @@
 from django.urls import include, path
 
-from . import views
+from . import api, autocomplete, feeds, sitemaps, views
 
 app_name = 'blog'
 
@@ -12,6 +12,8 @@ posts_urls = [
          name='edit_post'),
     path('<int:post_id>/delete/', views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
     path('<int:post_id>/comment/', views.CommentCreateView.as_view(),
          name='add_comment'),
     path('<int:post_id>/edit_comment/<int:comment_id>/',
@@ -20,15 +22,61 @@ posts_urls = [
          views.CommentDeleteView.as_view(), name='delete_comment'),
 ]
 
+api_urls = [
+    path('posts/', api.posts, name='api_posts'),
+    path('posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    path('posts/<int:post_id>/comments/', api.post_comments,
+         name='api_post_comments'),
+    path('category/<slug:category_slug>/posts/', api.category_posts,
+         name='api_category_posts'),
+    path('profile/<slug:username>/posts/', api.profile_posts,
+         name='api_profile_posts'),
+]
+
 urlpatterns = [
     path('', views.PostListView.as_view(), name='index'),
+    path('feed/', views.index_feed, name='index_feed'),
+    path('rss/', feeds.cached_feed(feeds.PostsFeed()), name='rss'),
+    path('atom/', feeds.cached_feed(feeds.PostsAtomFeed()), name='atom'),
     path('posts/', include(posts_urls)),
+    path('api/', include(api_urls)),
+    path('search/', views.search, name='search'),
+    path('autocomplete/locations/', autocomplete.location_autocomplete,
+         name='location_autocomplete'),
+    path('autocomplete/categories/', autocomplete.category_autocomplete,
+         name='category_autocomplete'),
+    path('autocomplete/users/', autocomplete.user_autocomplete,
+         name='user_autocomplete'),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap'),
+    path('sitemap-<slug:section>.xml', sitemaps.sitemap_section,
+         name='sitemap_section'),
     path(
         'category/<slug:category_slug>/',
         views.category_posts,
         name='category_posts'
     ),
+    path(
+        'category/<slug:category_slug>/feed/',
+        views.category_feed,
+        name='category_feed'
+    ),
+    path(
+        'category/<slug:category_slug>/rss/',
+        feeds.cached_feed(feeds.CategoryPostsFeed()),
+        name='category_rss'
+    ),
+    path(
+        'category/<slug:category_slug>/atom/',
+        feeds.cached_feed(feeds.CategoryPostsAtomFeed()),
+        name='category_atom'
+    ),
     path('profile/edit/', views.edit_profile,
          name='edit_profile'),
     path('profile/<slug:username>/', views.profile, name='profile'),
+    path('profile/<slug:username>/feed/', views.profile_feed,
+         name='profile_feed'),
+    path('profile/<slug:username>/rss/',
+         feeds.cached_feed(feeds.AuthorPostsFeed()), name='profile_rss'),
+    path('profile/<slug:username>/atom/',
+         feeds.cached_feed(feeds.AuthorPostsAtomFeed()), name='profile_atom'),
 ]
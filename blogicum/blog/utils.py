@@ -1,10 +1,48 @@
+import base64
+from datetime import datetime
+
 from django.core.paginator import Paginator
-from django.db.models import Count
+from django.db.models import (Case, Count, F, Min, OuterRef, Q, Subquery,
+                              Value, When)
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.functional import cached_property
 
-from blog.models import Post
+from blog.cache import cached_count, invalidate_tags
+from blog.models import Category, Comment, Post, StoredFile
 
 POSTS_TO_SHOW = 10
+COMMENTS_TO_SHOW = 20
+BATCH_SIZE = 500
+FEED_ORDERING = ('-pub_date', '-id')
+FEED_DEFERRED_FIELDS = ('text', 'text_html')
+CURSOR_SEPARATOR = '|'
+MIN_BIGINT = -2 ** 63
+MAX_BIGINT = 2 ** 63 - 1
+PAGE_RANGE_ON_EACH_SIDE = 2
+
+
+def published_posts_q():
+    """Условие видимости поста для всех, кроме автора."""
+    return Q(
+        pub_date__lte=timezone.now(),
+        is_published=True,
+        category__is_published=True
+    )
+
+
+def get_visible_posts(user):
+    """Посты, которые может открыть пользователь:
+    опубликованные и, для автора, все его собственные."""
+    visibility = published_posts_q()
+    if user.is_authenticated:
+        visibility |= Q(author=user)
+    return Post.objects.select_related(
+        'category',
+        'location',
+        'author'
+    ).filter(visibility)
 
 
 def get_post():
@@ -14,18 +52,314 @@ def get_post():
             'location',
             'author'
         ).filter(
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True
+            published_posts_q()
+        )
+    )
+
+
+def get_feed_posts():
+    """Опубликованные посты для карточек ленты, новые первыми."""
+    return get_post().defer(*FEED_DEFERRED_FIELDS).order_by(*FEED_ORDERING)
+
+
+def get_published_category(category_slug):
+    return get_object_or_404(
+        Category,
+        slug=category_slug,
+        is_published=True
+    )
+
+
+def get_next_pub_date(**filters):
+    """Время ближайшей отложенной публикации: в этот момент
+    пост появится в ленте без изменений в базе и без сброса
+    тегов кэша."""
+    return Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__gt=timezone.now(),
+        **filters,
+    ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
+
+
+def get_author_posts(user, author):
+    """Посты автора для карточек ленты.
+    Сам автор видит и неопубликованные посты."""
+    if user == author:
+        posts = Post.objects.select_related(
+            'category',
+            'location',
+            'author'
+        ).filter(author=author)
+    else:
+        posts = get_post().filter(author=author)
+    return posts.defer(*FEED_DEFERRED_FIELDS).order_by(*FEED_ORDERING)
+
+
+def change_comment_count(post_id, delta):
+    """Атомарно сдвигает счётчик комментариев поста на delta."""
+    if post_id is None:
+        return
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta,
+        updated_at=timezone.now(),
+    )
+
+
+def touch_post(post_id):
+    """Сдвигает updated_at поста, например после правки комментария."""
+    if post_id is None:
+        return
+    Post.objects.filter(pk=post_id).update(updated_at=timezone.now())
+
+
+def change_file_references(name, delta):
+    """Атомарно сдвигает число ссылок на файл на delta.
+    Файл, у которого не осталось ссылок, встает в очередь
+    на удаление с текущим временем."""
+    if not name:
+        return
+    if delta > 0:
+        StoredFile.objects.get_or_create(name=name)
+    StoredFile.objects.filter(name=name).update(
+        references=F('references') + delta,
+        released_at=Case(
+            When(references__lte=-delta, then=Value(timezone.now())),
+            default=None,
+        ),
+    )
+
+
+def rebuild_comment_count(posts=None):
+    """Пересчитывает счётчики комментариев одним UPDATE."""
+    published_comments = Comment.objects.filter(
+        post=OuterRef('pk'),
+        is_published=True,
+    ).order_by().values('post').annotate(total=Count('pk')).values('total')
+    if posts is None:
+        posts = Post.objects.all()
+    return posts.update(
+        comment_count=Coalesce(Subquery(published_comments), 0)
+    )
+
+
+def rebuild_text_html(model, batch_size=BATCH_SIZE):
+    """Заново рендерит сохраненный HTML текста у всех строк модели.
+    Строки читаются и обновляются пачками, поэтому память
+    не зависит от размера таблицы. bulk_update идет мимо сигналов,
+    поэтому теги постов каждой пачки сбрасываются здесь же:
+    иначе карточки и страницы в кэше показывали бы старый HTML."""
+    post_id_field = 'id' if model is Post else 'post_id'
+    updated = 0
+    batch = []
+    fields = ()
+
+    def flush():
+        model.objects.bulk_update(batch, fields)
+        invalidate_tags(*(
+            f'post:{getattr(obj, post_id_field)}' for obj in batch
+        ))
+        return len(batch)
+
+    objects = model.objects.only('id', 'text', post_id_field)
+    for obj in objects.iterator(batch_size):
+        derived_fields = obj.get_text_derived_fields()
+        for name, value in derived_fields.items():
+            setattr(obj, name, value)
+        fields = tuple(derived_fields)
+        batch.append(obj)
+        if len(batch) == batch_size:
+            updated += flush()
+            batch = []
+    if batch:
+        updated += flush()
+    return updated
+
+
+def encode_cursor(obj, field='pub_date'):
+    """Непрозрачный токен позиции объекта в ленте: (field, id).
+    Объектом может быть и словарь из .values()."""
+    if isinstance(obj, dict):
+        return make_cursor(obj[field], obj['id'])
+    return make_cursor(getattr(obj, field), obj.pk)
+
+
+def make_cursor(value, pk):
+    raw = f'{value.isoformat()}{CURSOR_SEPARATOR}{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Разбирает токен курсора. Для битого токена возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        pub_date, pk = raw.decode().split(CURSOR_SEPARATOR)
+        pub_date, pk = datetime.fromisoformat(pub_date), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not MIN_BIGINT <= pk <= MAX_BIGINT:
+        return None
+    return pub_date, pk
+
+
+class CursorPage:
+    """Страница ленты при пагинации по курсору (cursor_field, id).
+    Повторяет ту часть интерфейса Page, которой пользуются шаблоны."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous,
+                 cursor_field='pub_date'):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.cursor_field = cursor_field
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1], self.cursor_field)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0], self.cursor_field)
+        return None
+
+
+def cursor_paginating(post_list, after=None, before=None,
+                      per_page=POSTS_TO_SHOW):
+    """Страница ленты после (after) или до (before) токена курсора.
+    Стоимость запроса не зависит от глубины страницы:
+    нет ни OFFSET, ни COUNT(*)."""
+    cursor = decode_cursor(before or after or '')
+    if cursor is not None and before:
+        pub_date, pk = cursor
+        posts = list(
+            post_list.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+            ).order_by('pub_date', 'id')[:per_page + 1]
+        )
+        if posts:
+            return CursorPage(
+                posts[:per_page][::-1],
+                has_next=True,
+                has_previous=len(posts) > per_page,
+            )
+        cursor = None
+    if cursor is None:
+        posts = list(post_list.order_by(*FEED_ORDERING)[:per_page + 1])
+        return CursorPage(
+            posts[:per_page],
+            has_next=len(posts) > per_page,
+            has_previous=False,
         )
+    pub_date, pk = cursor
+    posts = list(
+        post_list.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        ).order_by(*FEED_ORDERING)[:per_page + 1]
     )
+    return CursorPage(
+        posts[:per_page],
+        has_next=len(posts) > per_page,
+        has_previous=True,
+    )
+
 
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который берет общее число постов ленты из кэша."""
 
-def comment_count(get_obj):
-    return get_obj.annotate(comment_count=Count('comments'))
+    def __init__(self, object_list, per_page, count_key, count_tags,
+                 count_expires_at=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.count_tags = count_tags
+        self.count_expires_at = count_expires_at
 
+    @cached_property
+    def count(self):
+        return cached_count(
+            self.object_list,
+            self.count_key,
+            self.count_tags,
+            self.count_expires_at,
+        )
+
+
+def comments_after(comments, after=None):
+    """Опубликованные комментарии после токена курсора
+    в порядке (created_at, id). Скрытые не выводятся нигде,
+    как и не учитываются в comment_count."""
+    comments = comments.filter(is_published=True)
+    cursor = decode_cursor(after or '')
+    if cursor is not None:
+        created_at, pk = cursor
+        comments = comments.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+        )
+    return comments.order_by('created_at', 'id')
 
-def paginating(request, post_list):
-    paginator = Paginator(post_list, POSTS_TO_SHOW)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+
+def comments_paginating(comments, after=None, per_page=COMMENTS_TO_SHOW):
+    """Страница комментариев после токена курсора (created_at, id)."""
+    comments = list(comments_after(comments, after)[:per_page + 1])
+    return CursorPage(
+        comments[:per_page],
+        has_next=len(comments) > per_page,
+        has_previous=decode_cursor(after or '') is not None,
+        cursor_field='created_at',
+    )
+
+
+def numbered_paginating(request, paginator):
+    """Страница по номеру ?page= с окном номеров вокруг текущей."""
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.elided_page_range = list(paginator.get_elided_page_range(
+        page_obj.number,
+        on_each_side=PAGE_RANGE_ON_EACH_SIDE,
+        on_ends=1,
+    ))
+    return page_obj
+
+
+def paginating(request, post_list, count_key=None, count_tags=(),
+               count_expires_at=None):
+    """Страница ленты: по курсору, если он есть в запросе,
+    иначе по номеру. При count_key число постов берется из кэша
+    и сбрасывается тегами count_tags или в момент count_expires_at."""
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before:
+        return cursor_paginating(post_list, after=after, before=before)
+    if count_key is None:
+        paginator = Paginator(post_list, POSTS_TO_SHOW)
+    else:
+        paginator = CachedCountPaginator(
+            post_list, POSTS_TO_SHOW, count_key, count_tags, count_expires_at
+        )
+    page_obj = numbered_paginating(request, paginator)
+    page_obj.next_cursor = (
+        encode_cursor(page_obj[len(page_obj) - 1])
+        if page_obj.has_next() else None
+    )
+    return page_obj
@@ -1,29 +1,106 @@
+from http import HTTPStatus
+
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
                                   UpdateView)
 from django.views.generic.edit import FormMixin
 
-from blog.models import Category, Comment, Post, User
+from blog.models import Comment, Post, User
 
+from .cache import (add_cache_tags, add_last_modified, add_post_cache_tags,
+                    cache_anonymous_page, conditional_page, expire_cache_at)
 from .forms import CommentForm, PostForm, UserForm
-from .utils import comment_count, get_post, paginating
+from .search import search_posts
+from .utils import (comments_paginating, cursor_paginating, get_author_posts,
+                    get_feed_posts, get_next_pub_date, get_published_category,
+                    get_visible_posts, numbered_paginating, paginating)
 
 POSTS_TO_SHOW = 10
 
 
-class CommentMixin:
+class AuthorObjectMixin:
+    """Загружает объект одним запросом в dispatch,
+    проверяет авторство и отдает тот же объект из get_object()."""
+
+    def get_object_lookup(self):
+        return {'pk': self.kwargs[self.pk_url_kwarg]}
+
+    def dispatch(self, request, *args, **kwargs):
+        self.object = get_object_or_404(
+            self.get_queryset(),
+            **self.get_object_lookup()
+        )
+        if self.object.author_id != request.user.pk:
+            return self.handle_not_author()
+        return super().dispatch(request, *args, **kwargs)
+
+    def handle_not_author(self):
+        return redirect('blog:post_detail', post_id=self.kwargs['post_id'])
+
+    def get_object(self, queryset=None):
+        return self.object
+
+
+def is_ajax(request):
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+class CommentFragmentMixin:
+    """На XHR/fetch-запросы отвечает фрагментом с комментарием
+    или коротким JSON вместо редиректа на страницу поста."""
+
+    def handle_no_permission(self):
+        if is_ajax(self.request):
+            return self.forbidden()
+        return super().handle_no_permission()
+
+    def handle_not_author(self):
+        if is_ajax(self.request):
+            return self.forbidden()
+        return super().handle_not_author()
+
+    def forbidden(self):
+        return JsonResponse(
+            {'status': 'forbidden'}, status=HTTPStatus.FORBIDDEN
+        )
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if not is_ajax(self.request):
+            return response
+        context = {
+            'comments': [self.object],
+            'post_id': self.object.post_id,
+        }
+        return render(self.request, 'includes/comment_list.html', context)
+
+    def form_invalid(self, form):
+        if is_ajax(self.request):
+            return JsonResponse(
+                {'status': 'invalid', 'errors': form.errors.get_json_data()},
+                status=HTTPStatus.BAD_REQUEST,
+            )
+        return super().form_invalid(form)
+
+
+class CommentMixin(AuthorObjectMixin):
 
     model = Comment
     pk_url_kwarg = 'comment_id'
     template_name = 'blog/comment_form.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        if (self.request.user == self.get_object().author):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('blog:post_detail', post_id=kwargs['post_id'])
+    def get_object_lookup(self):
+        return {
+            'pk': self.kwargs[self.pk_url_kwarg],
+            'post_id': self.kwargs['post_id'],
+        }
 
     def get_success_url(self) -> str:
         return reverse(
@@ -32,74 +109,186 @@ class CommentMixin:
         )
 
 
-class PostMixin:
+class PostMixin(AuthorObjectMixin):
 
     model = Post
     pk_url_kwarg = 'post_id'
     template_name = 'blog/post_form.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        if (self.request.user == self.get_object().author):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('blog:post_detail', self.get_object().pk)
-
 
+@method_decorator(conditional_page, name='dispatch')
+@method_decorator(cache_anonymous_page, name='dispatch')
 class PostListView(ListView):
     """Главная страница проекта.
     На ней расположен список всех постов.
     """
 
     model = Post
-    queryset = comment_count(get_post())
-    ordering = '-pub_date'
     paginate_by = POSTS_TO_SHOW
 
+    def get_queryset(self):
+        return get_feed_posts()
+
+    def paginate_queryset(self, queryset, page_size):
+        next_pub_date = get_next_pub_date()
+        page_obj = paginating(
+            self.request,
+            queryset,
+            count_key='feed',
+            count_tags=('feed',),
+            count_expires_at=next_pub_date,
+        )
+        add_cache_tags(self.request, 'feed')
+        expire_cache_at(self.request, next_pub_date)
+        add_post_cache_tags(self.request, page_obj)
+        return (
+            getattr(page_obj, 'paginator', None),
+            page_obj,
+            page_obj.object_list,
+            page_obj.has_other_pages(),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['fragment_url'] = reverse('blog:index_feed')
+        return context
+
 
+def add_category_cache_tags(request, category):
+    """Теги страницы категории. Возвращает время ближайшей
+    отложенной публикации в категории: до него живет кэш."""
+    add_cache_tags(
+        request,
+        f'category:{category.pk}',
+        f'feed:category:{category.pk}',
+    )
+    add_last_modified(request, category)
+    next_pub_date = get_next_pub_date(category=category)
+    expire_cache_at(request, next_pub_date)
+    return next_pub_date
+
+
+def add_profile_cache_tags(request, profile):
+    """Теги страницы автора. Автор видит свои посты
+    сразу, остальным они показываются по pub_date."""
+    add_cache_tags(
+        request,
+        'profiles',
+        f'author:{profile.pk}',
+        f'feed:author:{profile.pk}',
+    )
+    if request.user == profile:
+        return None
+    next_pub_date = get_next_pub_date(author=profile)
+    expire_cache_at(request, next_pub_date)
+    return next_pub_date
+
+
+@conditional_page
+@cache_anonymous_page
 def category_posts(request, category_slug):
     """Страница конкретной категории."""
-    category = get_object_or_404(
-        Category,
-        slug=category_slug,
-        is_published=True
-    )
-    post_list = comment_count(get_post()).filter(
-        category=category,
-    ).order_by(
-        '-pub_date'
+    category = get_published_category(category_slug)
+    post_list = get_feed_posts().filter(category=category)
+    page_obj = paginating(
+        request,
+        post_list,
+        count_key=f'feed:category:{category.pk}',
+        count_tags=(f'feed:category:{category.pk}',),
+        count_expires_at=add_category_cache_tags(request, category),
     )
-    page_obj = paginating(request, post_list)
+    add_post_cache_tags(request, page_obj)
     context = {
         'category': category,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'fragment_url': reverse('blog:category_feed', args=[category.slug]),
     }
     return render(request, 'blog/category.html', context)
 
 
+@conditional_page
+@cache_anonymous_page
 def profile(request, username):
     """Страница конкретного пользователя. """
     profile = get_object_or_404(User, username=username)
-    if request.user == profile:
-        post_list = comment_count(
-            Post.objects.select_related(
-                'category',
-                'location',
-                'author'
-            ).filter(author=profile)
-        ).order_by(
-            '-pub_date'
-        )
-    else:
-        post_list = comment_count(get_post()).filter(
-            author=profile
-        ).order_by('-pub_date')
-    page_obj = paginating(request, post_list)
+    post_list = get_author_posts(request.user, profile)
+    page_obj = paginating(
+        request,
+        post_list,
+        count_key=(
+            f'feed:author:{profile.pk}'
+            + (':own' if request.user == profile else '')
+        ),
+        count_tags=(f'feed:author:{profile.pk}', 'profiles'),
+        count_expires_at=add_profile_cache_tags(request, profile),
+    )
+    add_post_cache_tags(request, page_obj)
     context = {
         'profile': profile,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'fragment_url': reverse('blog:profile_feed', args=[username]),
     }
     return render(request, 'blog/profile.html', context)
 
 
+def feed_fragment(request, post_list, fragment_url):
+    """Следующая порция карточек ленты без обвязки страницы."""
+    page_obj = cursor_paginating(post_list, after=request.GET.get('after'))
+    add_post_cache_tags(request, page_obj)
+    context = {
+        'page_obj': page_obj,
+        'fragment_url': fragment_url,
+    }
+    return render(request, 'blog/feed_fragment.html', context)
+
+
+@cache_anonymous_page
+def index_feed(request):
+    """Фрагмент главной ленты для бесконечной прокрутки."""
+    add_cache_tags(request, 'feed')
+    expire_cache_at(request, get_next_pub_date())
+    return feed_fragment(request, get_feed_posts(), reverse('blog:index_feed'))
+
+
+@cache_anonymous_page
+def category_feed(request, category_slug):
+    """Фрагмент ленты категории для бесконечной прокрутки."""
+    category = get_published_category(category_slug)
+    add_category_cache_tags(request, category)
+    return feed_fragment(
+        request,
+        get_feed_posts().filter(category=category),
+        reverse('blog:category_feed', args=[category.slug]),
+    )
+
+
+@cache_anonymous_page
+def profile_feed(request, username):
+    """Фрагмент ленты пользователя для бесконечной прокрутки."""
+    profile = get_object_or_404(User, username=username)
+    add_profile_cache_tags(request, profile)
+    return feed_fragment(
+        request,
+        get_author_posts(request.user, profile),
+        reverse('blog:profile_feed', args=[username]),
+    )
+
+
+def search(request):
+    """Поиск по заголовкам и текстам опубликованных постов."""
+    query = request.GET.get('q', '').strip()
+    page_obj = numbered_paginating(
+        request,
+        Paginator(search_posts(get_feed_posts(), query), POSTS_TO_SHOW),
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'blog/search.html', context)
+
+
 @login_required
 def edit_profile(request):
     """Страница редактирования пользователя. """
@@ -111,35 +300,53 @@ def edit_profile(request):
     return render(request, 'blog/user.html', context)
 
 
+@method_decorator(conditional_page, name='dispatch')
+@method_decorator(cache_anonymous_page, name='dispatch')
 class PostDetailView(FormMixin, DetailView):
     """Страница конкретного поста. """
 
-    post_obj = None
     model = Post
     form_class = CommentForm
     pk_url_kwarg = 'post_id'
 
-    def get_queryset(self, queryset=None):
-        self.post_obj = get_object_or_404(
-            Post,
-            pk=self.kwargs.get(self.pk_url_kwarg, None)
-        )
-        if (self.post_obj.author != self.request.user):
-            self.post_obj = get_object_or_404(
-                get_post(),
-                pk=self.kwargs.get(self.pk_url_kwarg, None),
-
-            )
-        return super().get_queryset()
+    def get_queryset(self):
+        """Видимость, авторство и связанные объекты
+        проверяются и загружаются одним запросом."""
+        return get_visible_posts(self.request.user).defer('text')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['comments'] = (
-            self.object.comments.select_related('author')
+        context['comments'] = comments_paginating(
+            self.object.comments.select_related('author').defer('text')
         )
+        add_post_cache_tags(self.request, [self.object])
+        add_cache_tags(self.request, *(
+            f'author:{comment.author_id}' for comment in context['comments']
+        ))
         return context
 
 
+@cache_anonymous_page
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев поста."""
+    if not get_visible_posts(request.user).filter(pk=post_id).exists():
+        raise Http404
+    comments = comments_paginating(
+        Comment.objects.select_related('author').defer('text').filter(
+            post_id=post_id
+        ),
+        after=request.GET.get('after'),
+    )
+    add_cache_tags(request, f'post:{post_id}', *(
+        f'author:{comment.author_id}' for comment in comments
+    ))
+    context = {
+        'comments': comments,
+        'post_id': post_id,
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     """Страница создания поста. """
 
@@ -164,10 +371,11 @@ class PostUpdateView(LoginRequiredMixin, PostMixin, UpdateView):
 class PostDeleteView(LoginRequiredMixin, PostMixin, DeleteView):
     """Страница удаления поста. """
 
+    queryset = Post.objects.select_related('location')
     success_url = reverse_lazy('blog:index')
 
 
-class CommentCreateView(LoginRequiredMixin, CreateView):
+class CommentCreateView(CommentFragmentMixin, LoginRequiredMixin, CreateView):
     """Страница создания комментария. """
 
     model = Comment
@@ -189,13 +397,20 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         )
 
 
-class CommentUpdateView(LoginRequiredMixin, CommentMixin, UpdateView):
+class CommentUpdateView(CommentFragmentMixin, LoginRequiredMixin,
+                        CommentMixin, UpdateView):
     """Страница редактирования комментария. """
 
     form_class = CommentForm
 
 
-class CommentDeleteView(LoginRequiredMixin, CommentMixin, DeleteView):
+class CommentDeleteView(CommentFragmentMixin, LoginRequiredMixin,
+                        CommentMixin, DeleteView):
     """Страница удаления комментария. """
 
-    pass
+    def delete(self, request, *args, **kwargs):
+        if not is_ajax(request):
+            return super().delete(request, *args, **kwargs)
+        comment_id = self.object.pk
+        self.object.delete()
+        return JsonResponse({'status': 'deleted', 'id': comment_id})
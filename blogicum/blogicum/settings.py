@@ -122,12 +122,35 @@ INTERNAL_IPS = [
     '127.0.0.1',
 ]
 
+# Кэш страниц, карточек, счетчиков и валидаторов хранит версии тегов
+# в кэше по умолчанию, поэтому кэш должен быть общим для всех процессов
+# сервера: Memcached, Redis или DatabaseCache. LocMemCache свой
+# у каждого процесса и годится только для одного процесса, как
+# у runserver и тестов: с ним блог кэширует, лишь пока включен
+# BLOG_CACHE_ALLOW_PROCESS_LOCAL.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+BLOG_CACHE_ALLOW_PROCESS_LOCAL = DEBUG
+
 LOGIN_REDIRECT_URL = 'blog:index'
 
 LOGIN_URL = 'login'
 
+MEDIA_URL = '/media/'
+
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Передача медиафайлов фронтенд-серверу: префикс internal-location
+# nginx для X-Accel-Redirect или X-Sendfile для Apache и lighttpd.
+MEDIA_ACCEL_REDIRECT = None
+
+MEDIA_SENDFILE = False
+
 CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
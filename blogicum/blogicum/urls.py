@@ -1,10 +1,14 @@
+import re
+from urllib.parse import urlsplit
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
-from django.urls import include, path, reverse_lazy
+from django.urls import include, path, re_path, reverse_lazy
 from django.views.generic.edit import CreateView
 
+from blog.media import serve_media
+
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
 
@@ -28,4 +32,14 @@ if settings.DEBUG:
     import debug_toolbar
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Пустой префикс превратил бы маршрут медиафайлов в перехватчик
+# всех адресов, а внешний MEDIA_URL обслуживает другой сервер.
+media_prefix = settings.MEDIA_URL.strip('/')
+if media_prefix and not urlsplit(settings.MEDIA_URL).netloc:
+    urlpatterns += (
+        re_path(
+            r'^{}/(?P<path>.*)$'.format(re.escape(media_prefix)),
+            serve_media,
+            name='media',
+        ),
+    )
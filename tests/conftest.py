@@ -1,21 +1,27 @@
 import os
 import re
 import time
+from datetime import timedelta
 from http import HTTPStatus
 from inspect import getsource
+from io import BytesIO
 from pathlib import Path
+from types import SimpleNamespace
 from typing import (Any, Iterable, List, NamedTuple, Optional, Tuple, Type,
                     TypeVar, Union)
 
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.db.models import Field, Model
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
+from PIL import Image
 
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
@@ -32,6 +38,56 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_background_thumbnails(monkeypatch):
+    """Фоновая обработка фото не пишет файлы в MEDIA_ROOT во время тестов."""
+    monkeypatch.setattr(
+        "blog.signals.schedule_thumbnails", lambda name: None
+    )
+
+
+@pytest.fixture
+def time_shift(monkeypatch):
+    """Сдвигает на seconds секунд вперед timezone.now
+    и часы, по которым истекают записи локального кэша."""
+    from django.core.cache.backends import locmem
+    from django.utils import timezone
+
+    now, clock = timezone.now, time.time
+
+    def shift(seconds):
+        monkeypatch.setattr(
+            timezone, "now", lambda: now() + timedelta(seconds=seconds)
+        )
+        monkeypatch.setattr(
+            locmem, "time", SimpleNamespace(time=lambda: clock() + seconds)
+        )
+
+    return shift
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Файлы теста пишутся во временный MEDIA_ROOT."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def make_image(width, height, exif=None):
+    """JPEG-файл заданного размера для загрузки в пост."""
+    content = BytesIO()
+    image = Image.new("RGB", (width, height), "red")
+    image.save(content, "JPEG", exif=exif or Image.Exif())
+    return ContentFile(content.getvalue(), name="photo.jpg")
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,82 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from conftest import N_PER_PAGE
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_json(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f"Убедитесь, что `{url}` отвечает без ошибок."
+    )
+    content = b"".join(
+        response.streaming_content if response.streaming
+        else [response.content]
+    )
+    return json.loads(content)
+
+
+def test_feeds_with_cursor(
+        client, user, published_category,
+        many_posts_with_published_locations, future_posts
+):
+    visible_ids = {post.id for post in many_posts_with_published_locations}
+    for url in (
+        "/api/posts/",
+        f"/api/category/{published_category.slug}/posts/",
+        f"/api/profile/{user.username}/posts/",
+    ):
+        first = get_json(client, url)
+        assert len(first["results"]) == N_PER_PAGE and first["next"]
+        second = get_json(client, f"{url}?after={first['next']}")
+        ids = [post["id"] for post in first["results"] + second["results"]]
+        assert len(ids) == len(set(ids)) and set(ids) <= visible_ids, (
+            f"Убедитесь, что `{url}` отдаёт только опубликованные посты"
+            " и курсор не повторяет их."
+        )
+        back = get_json(client, f"{url}?before={second['previous']}")
+        assert back["results"] == first["results"]
+
+
+def test_post_detail(client, post_with_published_location, future_posts):
+    post = post_with_published_location
+    data = get_json(client, f"/api/posts/{post.id}/")
+    assert data["title"] == post.title
+    assert data["text_html"] == post.text_html
+    assert data["author"] == post.author.username
+    assert data["category"]["slug"] == post.category.slug
+    assert data["location"] == post.location.name
+    assert client.get(f"/api/posts/{future_posts[0].id}/").status_code == (
+        HTTPStatus.NOT_FOUND
+    ), "Убедитесь, что API не отдаёт отложенные посты."
+
+
+def test_post_list_is_one_query(client, many_posts_with_published_locations):
+    with CaptureQueriesContext(connection) as context:
+        get_json(client, "/api/posts/")
+    assert len(context.captured_queries) == 1, (
+        "Убедитесь, что лента API выбирается одним запросом."
+    )
+
+
+def test_comments_stream_with_cursor(
+        mixer, client, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(7).blend("blog.Comment", post=post)
+    url = f"/api/posts/{post.id}/comments/"
+    response = client.get(f"{url}?limit=5")
+    assert response.streaming, (
+        "Убедитесь, что список комментариев отдаётся потоком."
+    )
+    first = get_json(client, f"{url}?limit=5")
+    second = get_json(client, f"{url}?limit=5&after={first['next']}")
+    assert second["next"] is None
+    assert [
+        comment["id"] for comment in first["results"] + second["results"]
+    ] == [comment.id for comment in comments]
@@ -0,0 +1,44 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_edit_post_fetches_post_once(
+        user_client, django_assert_num_queries, post_with_published_location
+):
+    # Сессия, пользователь, один запрос поста и построение
+    # индексов подсказок категорий и местоположений.
+    with django_assert_num_queries(5):
+        response = user_client.get(
+            f"/posts/{post_with_published_location.id}/edit/"
+        )
+    assert response.status_code == 200
+
+
+def test_edit_comment_fetches_comment_once(
+        mixer, user, user_client, django_assert_num_queries,
+        post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    for url in (
+        f"/posts/{post.id}/edit_comment/{comment.id}/",
+        f"/posts/{post.id}/delete_comment/{comment.id}/",
+    ):
+        with django_assert_num_queries(3):
+            response = user_client.get(url)
+        assert response.status_code == 200
+
+
+def test_comment_must_belong_to_post_in_url(
+        mixer, user, user_client, post_with_published_location,
+        post_of_another_author
+):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    url = f"/posts/{post_of_another_author.id}/edit_comment/{comment.id}/"
+    assert user_client.get(url).status_code == 404, (
+        "Убедитесь, что комментарий нельзя отредактировать по адресу"
+        " другой публикации."
+    )
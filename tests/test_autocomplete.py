@@ -0,0 +1,176 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_results(client, url, query):
+    response = client.get(url, {"q": query})
+    assert response.status_code == HTTPStatus.OK, (
+        f"Убедитесь, что подсказки `{url}` загружаются без ошибок."
+    )
+    return [item["text"] for item in response.json()["results"]]
+
+
+def test_prefix_search(mixer, client):
+    for name in ("Москва", "мурманск", "Магадан", "Минск", "Омск"):
+        mixer.blend("blog.Location", name=name, is_published=True)
+    assert get_results(client, "/autocomplete/locations/", "м") == [
+        "Магадан", "Минск", "Москва", "мурманск"
+    ], (
+        "Убедитесь, что подсказки ищутся по началу названия"
+        " без учёта регистра и отсортированы."
+    )
+    assert get_results(client, "/autocomplete/locations/", "мос") == [
+        "Москва"
+    ]
+    assert get_results(client, "/autocomplete/locations/", "ск") == []
+
+
+def test_index_refreshed_on_save(
+        client, published_category, published_location
+):
+    url = "/autocomplete/categories/"
+    assert get_results(client, url, published_category.title[:3])
+    published_category.title = "Ёжики"
+    published_category.save()
+    assert get_results(client, url, "ёж") == ["Ёжики"], (
+        "Убедитесь, что индекс подсказок обновляется при сохранении."
+    )
+    published_category.is_published = False
+    published_category.save()
+    assert get_results(client, url, "ёж") == [], (
+        "Убедитесь, что подсказки не показывают неопубликованные категории."
+    )
+
+
+def test_user_autocomplete(mixer, client, user, django_user_model):
+    inactive = mixer.blend(django_user_model, is_active=False)
+    url = "/autocomplete/users/"
+    assert get_results(client, url, user.username) == [user.username], (
+        "Убедитесь, что имена пользователей подсказываются по префиксу."
+    )
+    assert get_results(client, url, inactive.username) == [], (
+        "Убедитесь, что подсказки не показывают неактивных пользователей."
+    )
+
+
+def test_index_expires(monkeypatch, client, published_location):
+    from blog import autocomplete
+    from blog.models import Location
+
+    url = "/autocomplete/locations/"
+    assert get_results(client, url, published_location.name)
+    # Правка из другого процесса: локальный кэш тегов о ней не знает.
+    Location.objects.filter(pk=published_location.pk).update(name="Ялта")
+    assert get_results(client, url, "ялта") == []
+    now = autocomplete.monotonic()
+    monkeypatch.setattr(
+        autocomplete, "monotonic",
+        lambda: now + autocomplete.AUTOCOMPLETE_INDEX_TTL,
+    )
+    assert get_results(client, url, "ялта") == ["Ялта"], (
+        "Убедитесь, что индекс подсказок перестраивается по истечении срока."
+    )
+
+
+def test_post_form_does_not_list_locations(
+        mixer, user_client, django_assert_num_queries,
+        post_with_published_location
+):
+    other_locations = mixer.cycle(30).blend("blog.Location")
+    url = f"/posts/{post_with_published_location.id}/edit/"
+    user_client.get(url)
+    # Сессия, пользователь и пост: подписи выбранных
+    # категории и местоположения берутся из индекса.
+    with django_assert_num_queries(3):
+        response = user_client.get(url)
+    content = response.content.decode()
+    assert post_with_published_location.location.name in content
+    assert not any(
+        location.name in content for location in other_locations
+    ), (
+        "Убедитесь, что форма поста не выводит все местоположения,"
+        " а подсказывает их по мере ввода."
+    )
+
+
+def test_post_form_validates_published_choices(
+        mixer, user_client, post_with_published_location, another_category
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/edit/"
+    user_client.get(url)
+    data = {
+        "title": "Новый заголовок",
+        "text": post.text,
+        "pub_date": post.pub_date.strftime("%Y-%m-%dT%H:%M"),
+        "location": post.location_id,
+        "category": another_category.id,
+    }
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.post(url, data)
+    assert response.status_code == HTTPStatus.FOUND
+    relation_queries = [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith("SELECT") and (
+            'FROM "blog_category"' in query["sql"]
+            or 'FROM "blog_location"' in query["sql"]
+        )
+    ]
+    # Форма проверяет id по индексу, а модель — наличие строки
+    # одним запросом на связь.
+    assert len(relation_queries) <= 2 and all(
+        '"id" = ' in sql and "LIMIT 1" in sql for sql in relation_queries
+    ), (
+        "Убедитесь, что id категории и местоположения в форме поста"
+        " проверяются по кэшу вариантов, без чтения строк из базы."
+    )
+    post.refresh_from_db()
+    assert post.category_id == another_category.id
+
+    hidden_category = mixer.blend("blog.Category", is_published=False)
+    for category_id in (another_category.id + 1000, hidden_category.id):
+        data["category"] = category_id
+        response = user_client.post(url, data)
+        assert response.status_code == HTTPStatus.OK, (
+            "Убедитесь, что в форме поста нельзя выбрать"
+            " неопубликованную категорию."
+        )
+        assert "category" in response.context["form"].errors
+
+
+def test_post_form_keeps_unpublished_relations(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    for relation in (post.location, post.category):
+        relation.is_published = False
+        relation.save()
+    url = f"/posts/{post.id}/edit/"
+    content = user_client.get(url).content.decode()
+    assert f'name="location" value="{post.location_id}"' in content, (
+        "Убедитесь, что форма поста выводит текущее местоположение,"
+        " даже если его сняли с публикации."
+    )
+    assert post.location.name in content
+    data = {
+        "title": "Новый заголовок",
+        "text": post.text,
+        "pub_date": post.pub_date.strftime("%Y-%m-%dT%H:%M"),
+        "location": post.location_id,
+        "category": post.category_id,
+    }
+    response = user_client.post(url, data)
+    assert response.status_code == HTTPStatus.FOUND, (
+        "Убедитесь, что пост со снятой с публикации категорией"
+        " можно сохранить, не меняя её."
+    )
+    location_id, category_id = post.location_id, post.category_id
+    post.refresh_from_db()
+    assert (post.location_id, post.category_id) == (
+        location_id, category_id
+    ), "Убедитесь, что форма поста не обнуляет его текущие связи."
@@ -0,0 +1,67 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+AJAX = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+
+def test_ajax_add_comment_returns_fragment(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", data={"text": "Новый комментарий"},
+        **AJAX
+    )
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert "Новый комментарий" in content and "<html" not in content, (
+        "Убедитесь, что на fetch-запрос создания комментария возвращается"
+        " только фрагмент с новым комментарием."
+    )
+    assert post.comments.count() == 1
+
+
+def test_ajax_add_invalid_comment_returns_json(
+        user_client, post_with_published_location
+):
+    response = user_client.post(
+        f"/posts/{post_with_published_location.id}/comment/",
+        data={"text": ""},
+        **AJAX
+    )
+    assert response.status_code == 400
+    assert "text" in response.json()["errors"]
+
+
+def test_ajax_edit_and_delete_comment(
+        mixer, user, user_client, another_user_client,
+        post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    edit_url = f"/posts/{post.id}/edit_comment/{comment.id}/"
+    delete_url = f"/posts/{post.id}/delete_comment/{comment.id}/"
+
+    response = another_user_client.post(edit_url, data={"text": "x"}, **AJAX)
+    assert response.status_code == 403, (
+        "Убедитесь, что чужой комментарий нельзя изменить fetch-запросом."
+    )
+
+    response = user_client.post(edit_url, data={"text": "Исправлено"}, **AJAX)
+    assert "Исправлено" in response.content.decode()
+
+    response = user_client.post(delete_url, **AJAX)
+    assert response.json() == {"status": "deleted", "id": comment.id}
+    assert not post.comments.exists()
+
+
+def test_regular_requests_still_redirect(
+        mixer, user, another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    response = another_user_client.post(
+        f"/posts/{post.id}/delete_comment/{comment.id}/"
+    )
+    assert response.status_code == 302
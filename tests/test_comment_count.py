@@ -0,0 +1,84 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_comment_count(post):
+    post.refresh_from_db(fields=["comment_count"])
+    return post.comment_count
+
+
+def test_comment_views_update_counter(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.post(f"/posts/{post.id}/comment/", data={"text": "Текст"})
+    assert get_comment_count(post) == 1, (
+        "Убедитесь, что при создании комментария счётчик комментариев"
+        " публикации увеличивается."
+    )
+    comment = post.comments.get()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    assert get_comment_count(post) == 0, (
+        "Убедитесь, что при удалении комментария счётчик комментариев"
+        " публикации уменьшается."
+    )
+
+
+def test_unpublished_comments_not_counted(mixer, post_with_published_location):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, is_published=True)
+    assert get_comment_count(post) == 1
+
+    comment.is_published = False
+    comment.save()
+    assert get_comment_count(post) == 0, (
+        "Убедитесь, что снятый с публикации комментарий"
+        " не учитывается в счётчике."
+    )
+
+    comment.is_published = True
+    comment.save()
+    assert get_comment_count(post) == 1
+
+
+def test_rebuild_comment_count_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post, is_published=True)
+    mixer.blend("blog.Comment", post=post, is_published=False)
+    type(post).objects.update(comment_count=0)
+
+    call_command("rebuild_comment_count", stdout=StringIO())
+    assert get_comment_count(post) == 3, (
+        "Убедитесь, что команда `rebuild_comment_count` пересчитывает"
+        " опубликованные комментарии."
+    )
+
+
+def test_unpublished_comments_not_shown(
+        mixer, client, post_with_published_location
+):
+    post = post_with_published_location
+    shown = mixer.blend(
+        "blog.Comment", post=post, is_published=True, text="Видимый"
+    )
+    hidden = mixer.blend(
+        "blog.Comment", post=post, is_published=False, text="Скрытый"
+    )
+    urls = (f"/posts/{post.id}/", f"/posts/{post.id}/comments/")
+    for url in urls:
+        content = client.get(url).content.decode()
+        assert f"comment_{shown.id}" in content
+        assert f"comment_{hidden.id}" not in content, (
+            f"Убедитесь, что на странице `{url}` не выводятся"
+            " снятые с публикации комментарии."
+        )
+    response = client.get(f"/api/posts/{post.id}/comments/")
+    results = json.loads(b"".join(response.streaming_content))["results"]
+    assert [comment["id"] for comment in results] == [shown.id], (
+        "Убедитесь, что API не отдаёт снятые с публикации комментарии."
+    )
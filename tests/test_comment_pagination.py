@@ -0,0 +1,57 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+N_COMMENTS = 25
+
+
+@pytest.fixture
+def post_with_many_comments(mixer, user, post_with_published_location):
+    mixer.cycle(N_COMMENTS).blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    return post_with_published_location
+
+
+def test_detail_renders_first_comments(client, post_with_many_comments):
+    response = client.get(f"/posts/{post_with_many_comments.id}/")
+    comments = response.context["comments"]
+    assert len(comments) < N_COMMENTS, (
+        "Убедитесь, что на странице поста выводится только первая"
+        " порция комментариев."
+    )
+    assert comments.has_next()
+    assert f"?after={comments.next_cursor}" in response.content.decode()
+
+
+def test_comments_fragment_returns_the_rest(client, post_with_many_comments):
+    post = post_with_many_comments
+    first_page = client.get(f"/posts/{post.id}/").context["comments"]
+    response = client.get(
+        f"/posts/{post.id}/comments/?after={first_page.next_cursor}"
+    )
+    assert response.status_code == 200
+    rest = response.context["comments"]
+    assert [c.id for c in first_page] + [c.id for c in rest] == list(
+        post.comments.order_by("created_at", "id").values_list(
+            "id", flat=True
+        )
+    ), (
+        "Убедитесь, что фрагмент комментариев продолжает список"
+        " с места, где остановилась страница поста."
+    )
+    assert not rest.has_next()
+    assert "<html" not in response.content.decode()
+
+
+def test_comments_fragment_respects_visibility(
+        another_user_client, post_with_many_comments
+):
+    post = post_with_many_comments
+    post.is_published = False
+    post.save()
+    response = another_user_client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == 404, (
+        "Убедитесь, что комментарии скрытого поста недоступны"
+        " другим пользователям."
+    )
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def page_urls(user, published_category, post_with_published_location):
+    return (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{post_with_published_location.id}/",
+    )
+
+
+def get_etag(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"
+    ), f"Убедитесь, что страница `{url}` отдаёт ETag и Last-Modified."
+    return response["ETag"]
+
+
+@pytest.mark.parametrize("client_fixture", ("client", "user_client"))
+def test_not_modified_without_rendering(request, client_fixture, page_urls):
+    client = request.getfixturevalue(client_fixture)
+    for url in page_urls:
+        # Первый ответ может выставить CSRF-cookie, а она входит в ETag.
+        client.get(url)
+        etag = get_etag(client, url)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f"Убедитесь, что страница `{url}` с неизменившимся ETag"
+            " отвечает 304."
+        )
+        assert not response.content
+        assert not [
+            query for query in context.captured_queries
+            if '"blog_' in query["sql"]
+        ], f"Убедитесь, что ответ 304 для `{url}` не читает публикации."
+
+
+def test_etag_changes_with_content(
+        user_client, page_urls, post_with_published_location, comment_to_a_post
+):
+    for url in page_urls:
+        user_client.get(url)
+    etags = {url: get_etag(user_client, url) for url in page_urls}
+    comment_to_a_post.text = "Новый текст комментария"
+    comment_to_a_post.save()
+    detail_url = f"/posts/{post_with_published_location.id}/"
+    assert get_etag(user_client, detail_url) != etags[detail_url], (
+        "Убедитесь, что изменение комментария меняет ETag страницы поста."
+    )
+    post_with_published_location.refresh_from_db()
+    post_with_published_location.title = "Новый заголовок"
+    post_with_published_location.save()
+    for url in page_urls:
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что после изменения поста страница `{url}`"
+            " отдаётся заново."
+        )
+
+
+def test_etag_depends_on_viewer(user_client, another_user_client, page_urls):
+    for url in page_urls:
+        another_user_client.get(url)
+        response = another_user_client.get(
+            url, HTTP_IF_NONE_MATCH=get_etag(user_client, url)
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что ETag страницы `{url}` зависит от пользователя."
+        )
+
+
+def test_etag_changes_when_scheduled_post_goes_live(
+        mixer, client, user, published_category, time_shift
+):
+    mixer.blend("blog.Post", author=user, category=published_category)
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(minutes=1),
+    )
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    )
+    for url in urls:
+        client.get(url)
+    etags = {url: get_etag(client, url) for url in urls}
+    time_shift(61)
+    for url in urls:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что страница `{url}` не отвечает 304,"
+            " когда наступает время отложенной публикации."
+        )
+
+
+def test_last_modified_moves_forward_on_delete(
+        mixer, client, user, published_category, time_shift
+):
+    _, newest = (
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            pub_date=timezone.now() - timedelta(days=days),
+        )
+        for days in (2, 1)
+    )
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+        "/rss/",
+    )
+    last_modified = {url: client.get(url)["Last-Modified"] for url in urls}
+    time_shift(5)
+    newest.delete()
+    for url in urls:
+        # Первый запрос заново строит валидаторы, второй сверяется с ними.
+        client.get(url)
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified[url])
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что Last-Modified страницы `{url}` не уходит назад,"
+            " когда новейшую публикацию удаляют."
+        )
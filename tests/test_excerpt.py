@@ -0,0 +1,38 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+LONG_TEXT = " ".join(f"слово{i}" for i in range(100))
+
+
+def test_excerpt_saved_with_post(post_with_published_location):
+    post = post_with_published_location
+    post.text = LONG_TEXT
+    post.save()
+    post.refresh_from_db()
+    assert post.excerpt == " ".join(LONG_TEXT.split()[:10]) + " …", (
+        "Убедитесь, что при сохранении поста в него записывается"
+        " отрывок из первых 10 слов текста."
+    )
+
+
+def test_feeds_do_not_load_text(
+        user, user_client, published_category, post_with_published_location
+):
+    for url in (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    ):
+        with CaptureQueriesContext(connection) as context:
+            user_client.get(url)
+        post_queries = [
+            query["sql"] for query in context.captured_queries
+            if 'FROM "blog_post"' in query["sql"]
+        ]
+        assert post_queries
+        assert not any(
+            '"blog_post"."text"' in sql for sql in post_queries
+        ), f"Убедитесь, что лента `{url}` не загружает полный текст постов."
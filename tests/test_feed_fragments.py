@@ -0,0 +1,51 @@
+import pytest
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize(
+    "page_template, fragment_template",
+    (
+        ("/", "/feed/"),
+        ("/category/{slug}/", "/category/{slug}/feed/"),
+        ("/profile/{username}/", "/profile/{username}/feed/"),
+    ),
+)
+def test_feed_fragment_continues_page(
+        page_template, fragment_template, user, client, published_category,
+        many_posts_with_published_locations
+):
+    urls = {"slug": published_category.slug, "username": user.username}
+    page_url = page_template.format(**urls)
+    fragment_url = fragment_template.format(**urls)
+
+    page_obj = client.get(page_url).context["page_obj"]
+    assert f"{fragment_url}?after={page_obj.next_cursor}" in client.get(
+        page_url
+    ).content.decode(), (
+        f"Убедитесь, что страница `{page_url}` ссылается на фрагмент"
+        " со следующей порцией публикаций."
+    )
+
+    response = client.get(f"{fragment_url}?after={page_obj.next_cursor}")
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert "<html" not in content and "<header" not in content, (
+        f"Убедитесь, что `{fragment_url}` возвращает только карточки постов."
+    )
+    fragment_page = response.context["page_obj"]
+    assert len(fragment_page) == N_PER_PAGE
+    assert not {post.id for post in fragment_page} & {
+        post.id for post in page_obj
+    }
+    assert content.count("<article") == N_PER_PAGE
+
+
+def test_category_fragment_hidden_for_unpublished_category(
+        client, published_category
+):
+    published_category.is_published = False
+    published_category.save()
+    response = client.get(f"/category/{published_category.slug}/feed/")
+    assert response.status_code == 404
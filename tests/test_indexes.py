@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return "\n".join(row[-1] for row in cursor.fetchall())
+
+
+def get_feed_plans(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return [
+        explain(query["sql"])
+        for query in context.captured_queries
+        if 'FROM "blog_post"' in query["sql"] and "ORDER BY" in query["sql"]
+    ]
+
+
+@pytest.mark.parametrize(
+    "url_template, index_name",
+    (
+        ("/", "post_feed_idx"),
+        ("/?after={cursor}", "post_feed_idx"),
+        ("/category/{category}/", "post_category_feed_idx"),
+        ("/profile/{username}/", "post_author_feed_idx"),
+    ),
+)
+def test_feed_uses_index(
+        url_template, index_name, user, another_user_client,
+        published_category, many_posts_with_published_locations
+):
+    cursor = another_user_client.get("/").context["page_obj"].next_cursor
+    url = url_template.format(
+        cursor=cursor,
+        category=published_category.slug,
+        username=user.username,
+    )
+    plans = get_feed_plans(another_user_client, url)
+    assert plans, f"Убедитесь, что страница `{url}` выбирает публикации."
+    for plan in plans:
+        assert index_name in plan and "TEMP B-TREE" not in plan, (
+            f"Убедитесь, что лента `{url}` читается по индексу `{index_name}`"
+            f" без сортировки во временном B-дереве. План запроса:\n{plan}"
+        )
+
+
+def test_own_profile_uses_author_index(
+        user, user_client, many_posts_with_published_locations
+):
+    url = f"/profile/{user.username}/"
+    for plan in get_feed_plans(user_client, url):
+        assert "post_author_feed_idx" in plan, (
+            "Убедитесь, что автор видит свою ленту через индекс"
+            f" `post_author_feed_idx`. План запроса:\n{plan}"
+        )
+
+
+def test_comments_use_index(user_client, comment_to_a_post):
+    post_id = comment_to_a_post.post_id
+    with CaptureQueriesContext(connection) as context:
+        user_client.get(f"/posts/{post_id}/")
+    plans = [
+        explain(query["sql"])
+        for query in context.captured_queries
+        if 'FROM "blog_comment"' in query["sql"]
+    ]
+    assert plans
+    for plan in plans:
+        assert "comment_post_created_idx" in plan and "TEMP B-TREE" not in plan, (
+            "Убедитесь, что комментарии к посту читаются по индексу"
+            f" `comment_post_created_idx`. План запроса:\n{plan}"
+        )
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.files.base import ContentFile
+
+pytestmark = [pytest.mark.django_db]
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_file(media_root):
+    from blog.models import Post
+
+    return Post.image.field.storage.save(
+        "post_images/photo.jpg", ContentFile(CONTENT)
+    )
+
+
+def get_media(client, name, **headers):
+    return client.get(f"/media/{name}", **headers)
+
+
+def test_media_cache_headers(client, media_file):
+    response = get_media(client, media_file)
+    assert response.status_code == HTTPStatus.OK
+    assert b"".join(response.streaming_content) == CONTENT
+    assert response["Content-Type"] == "image/jpeg"
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что медиафайлы отдаются с долгим неизменяемым кэшем."
+    )
+    etag = response["ETag"]
+    assert etag.startswith('"') and media_file.split("/")[-1].startswith(
+        etag.strip('"')
+    ), "Убедитесь, что ETag файла — сильный хеш его содержимого."
+    response = get_media(client, media_file, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert get_media(client, "../settings.py").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert get_media(client, "post_images/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+def test_thumbnails_not_immutable(client, media_root):
+    from django.core.files.storage import default_storage
+
+    name = default_storage.save("thumbs/photo-320.jpg", ContentFile(CONTENT))
+    response = get_media(client, name)
+    assert response.status_code == HTTPStatus.OK
+    assert "immutable" not in response["Cache-Control"], (
+        "Убедитесь, что immutable получают только файлы с хешем в имени."
+    )
+    assert "must-revalidate" in response["Cache-Control"]
+
+
+def test_media_route_is_not_catch_all(client, post_with_published_location):
+    response = client.get(f"/posts/{post_with_published_location.id}")
+    assert response.status_code == HTTPStatus.MOVED_PERMANENTLY, (
+        "Убедитесь, что маршрут медиафайлов не перехватывает адреса"
+        " без завершающего слеша."
+    )
+
+
+def test_media_range_requests(client, media_file):
+    response = get_media(client, media_file, HTTP_RANGE="bytes=10-19")
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT, (
+        "Убедитесь, что медиафайлы отдаются по частям по заголовку Range."
+    )
+    assert b"".join(response.streaming_content) == CONTENT[10:20]
+    assert response["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response["Content-Length"] == "10"
+    response = get_media(client, media_file, HTTP_RANGE="bytes=-5")
+    assert b"".join(response.streaming_content) == CONTENT[-5:]
+    response = get_media(
+        client, media_file,
+        HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"stale"',
+    )
+    assert response.status_code == HTTPStatus.OK
+    response = get_media(client, media_file, HTTP_RANGE="bytes=5000-")
+    assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_media_delegated_to_front_end(client, media_file, settings):
+    settings.MEDIA_ACCEL_REDIRECT = "/protected-media/"
+    response = get_media(client, media_file)
+    assert response["X-Accel-Redirect"] == f"/protected-media/{media_file}", (
+        "Убедитесь, что при MEDIA_ACCEL_REDIRECT файл передает nginx."
+    )
+    assert response.content == b""
+    assert response["Content-Type"] == "image/jpeg"
+    settings.MEDIA_ACCEL_REDIRECT = None
+    settings.MEDIA_SENDFILE = True
+    response = get_media(client, media_file)
+    assert response["X-Sendfile"] == str(settings.MEDIA_ROOT / media_file)
@@ -0,0 +1,128 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from conftest import make_image
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_content_addressed_names(media_root):
+    from blog.models import Post
+
+    storage = Post.image.field.storage
+    first = storage.save("post_images/one.JPG", ContentFile(b"same"))
+    second = storage.save("post_images/two.jpg", ContentFile(b"same"))
+    other = storage.save("post_images/one.JPG", ContentFile(b"other"))
+    assert first == second, (
+        "Убедитесь, что одинаковые файлы хранятся под одним именем."
+    )
+    assert first != other
+    directory, shard_1, shard_2, filename = first.split("/")
+    assert directory == "post_images", (
+        "Убедитесь, что хранилище сохраняет каталог из upload_to."
+    )
+    assert filename.startswith(shard_1 + shard_2)
+    assert filename.endswith(".jpg")
+    assert len(list((media_root / directory).rglob("*"))) == 6, (
+        "Убедитесь, что файлы раскладываются по вложенным каталогам"
+        " без временных файлов."
+    )
+
+
+def test_shared_file_references(
+    mixer, user, published_category, media_root
+):
+    from blog.models import StoredFile
+
+    posts = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category, image=None
+    )
+    for post in posts:
+        post.image.save("photo.jpg", make_image(50, 50))
+    name = posts[0].image.name
+    assert posts[1].image.name == name
+    assert StoredFile.objects.get(name=name).references == 2, (
+        "Убедитесь, что ссылки на общий файл фото подсчитываются."
+    )
+    path = media_root / name
+    posts[0].delete()
+    assert path.exists(), (
+        "Убедитесь, что файл не удаляется, пока на него ссылается пост."
+    )
+    posts[1].image = ""
+    posts[1].save()
+    stored_file = StoredFile.objects.get(name=name)
+    assert stored_file.references == 0
+    assert stored_file.released_at is not None, (
+        "Убедитесь, что файл без ссылок встает в очередь на удаление."
+    )
+    assert path.exists()
+
+
+def test_collect_orphaned_images(
+    mixer, user, published_category, media_root
+):
+    from blog.images import thumbnail_name
+    from blog.models import Post
+
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, image=None
+    )
+    post.image.save("kept.jpg", make_image(20, 20))
+    storage = Post.image.field.storage
+    untracked = storage.save("post_images/lost.jpg", make_image(30, 30))
+    thumbnail = media_root / thumbnail_name(untracked, 320, "jpg")
+    thumbnail.parent.mkdir(parents=True)
+    thumbnail.write_bytes(b"thumbnail")
+    released = mixer.blend(
+        "blog.Post", author=user, category=published_category, image=None
+    )
+    released.image.save("released.jpg", make_image(40, 40))
+    released_name = released.image.name
+    released.delete()
+
+    output = StringIO()
+    call_command("collect_orphaned_images", stdout=output)
+    assert "файлов: 0" in output.getvalue(), (
+        "Убедитесь, что свежие файлы не удаляются до истечения срока."
+    )
+    output = StringIO()
+    call_command(
+        "collect_orphaned_images", "--grace-hours=0", "--dry-run",
+        stdout=output,
+    )
+    assert released_name in output.getvalue()
+    assert untracked in output.getvalue()
+    assert post.image.name not in output.getvalue()
+    assert storage.exists(untracked), (
+        "Убедитесь, что с --dry-run файлы не удаляются."
+    )
+    call_command("collect_orphaned_images", "--grace-hours=0", stdout=output)
+    assert not storage.exists(untracked)
+    assert not storage.exists(released_name)
+    assert not thumbnail.exists(), (
+        "Убедитесь, что вместе с фото удаляются его миниатюры."
+    )
+    assert storage.exists(post.image.name), (
+        "Убедитесь, что файлы, на которые ссылаются посты, не удаляются."
+    )
+
+
+def test_reuploaded_image_not_deleted(media_root):
+    from blog.images import delete_image
+    from blog.models import Post
+
+    storage = Post.image.field.storage
+    name = storage.save("post_images/again.jpg", make_image(30, 30))
+    cutoff = timezone.now() - timedelta(hours=1)
+    assert not delete_image(name, cutoff)
+    assert storage.exists(name), (
+        "Убедитесь, что перед удалением заново проверяется время"
+        " изменения файла."
+    )
+    assert delete_image(name, timezone.now() + timedelta(seconds=1))
+    assert not storage.exists(name)
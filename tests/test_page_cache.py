@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f"Убедитесь, что страница `{url}` загружается без ошибок."
+    )
+    return len(context.captured_queries)
+
+
+@pytest.fixture
+def anonymous_urls(user, published_category, post_with_published_location):
+    return (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{post_with_published_location.id}/",
+    )
+
+
+def test_anonymous_pages_cached(client, anonymous_urls):
+    for url in anonymous_urls:
+        assert count_queries(client, url)
+        assert count_queries(client, url) == 0, (
+            f"Убедитесь, что страница `{url}` для анонимного посетителя"
+            " отдаётся из кэша без запросов к базе данных."
+        )
+
+
+def test_authenticated_pages_not_cached(user_client, anonymous_urls):
+    for url in anonymous_urls:
+        count_queries(user_client, url)
+        assert count_queries(user_client, url), (
+            f"Убедитесь, что страница `{url}` не кэшируется"
+            " для авторизованного пользователя."
+        )
+
+
+def test_comment_purges_only_pages_showing_post(
+        mixer, client, user, published_category, anonymous_urls,
+        post_with_published_location, post_of_another_author
+):
+    post = post_with_published_location
+    other_detail_url = f"/posts/{post_of_another_author.id}/"
+    for url in (*anonymous_urls, other_detail_url):
+        count_queries(client, url)
+
+    mixer.blend("blog.Comment", post=post, author=user)
+
+    for url in anonymous_urls:
+        assert count_queries(client, url), (
+            f"Убедитесь, что новый комментарий сбрасывает кэш страницы `{url}`"
+            " с этой публикацией."
+        )
+    assert count_queries(client, other_detail_url) == 0, (
+        "Убедитесь, что новый комментарий не сбрасывает кэш страниц,"
+        " на которых нет этой публикации."
+    )
+
+
+def test_category_change_purges_category_page(
+        client, published_category, post_with_published_location
+):
+    url = f"/category/{published_category.slug}/"
+    count_queries(client, url)
+    published_category.description = "Новое описание категории"
+    published_category.save()
+    assert "Новое описание категории" in client.get(url).content.decode()
+
+
+def test_scheduled_post_appears_in_cached_pages(
+        mixer, client, user, published_category, time_shift
+):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Опубликованный пост",
+    )
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Отложенный пост",
+        pub_date=timezone.now() + timedelta(minutes=1),
+    )
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    )
+    for url in urls:
+        assert "Отложенный пост" not in client.get(url).content.decode()
+    time_shift(61)
+    for url in urls:
+        content = client.get(url).content.decode()
+        assert "Опубликованный пост" in content
+        assert "Отложенный пост" in content, (
+            f"Убедитесь, что закэшированная страница `{url}` перестраивается,"
+            " когда наступает время отложенной публикации."
+        )
+
+
+def test_process_local_cache_disabled(client, settings, anonymous_urls):
+    settings.BLOG_CACHE_ALLOW_PROCESS_LOCAL = False
+    for url in anonymous_urls:
+        count_queries(client, url)
+        assert count_queries(client, url), (
+            "Убедитесь, что с кэшем, своим у каждого процесса,"
+            " страницы не кэшируются."
+        )
+        assert not client.get(url).has_header("ETag")
+
+
+def test_tags_invalidated_after_commit(
+        comment_to_a_post, django_capture_on_commit_callbacks
+):
+    from blog.cache import get_tag_versions
+
+    tag = f"post:{comment_to_a_post.post_id}"
+    with django_capture_on_commit_callbacks() as callbacks:
+        comment_to_a_post.save()
+        version = get_tag_versions([tag])[tag]
+    for callback in callbacks:
+        callback()
+    assert get_tag_versions([tag])[tag] != version, (
+        "Убедитесь, что теги кэша сбрасываются и после коммита:"
+        " страница, собранная до коммита, не должна остаться в кэше."
+    )
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+import pytest
+from conftest import N_PER_PAGE
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_page_posts(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, (
+        f"Убедитесь, что страница `{url}` загружается без ошибок."
+    )
+    return response.context["page_obj"]
+
+
+def test_cursor_pages_match_numbered_pages(
+        user_client, many_posts_with_published_locations
+):
+    first_page = get_page_posts(user_client, "/")
+    assert first_page.next_cursor, (
+        "Убедитесь, что у первой страницы ленты есть токен курсора"
+        " для перехода на следующую страницу."
+    )
+    second_page = get_page_posts(user_client, "/?page=2")
+    cursor_page = get_page_posts(
+        user_client, f"/?after={first_page.next_cursor}"
+    )
+    assert [post.id for post in cursor_page] == [
+        post.id for post in second_page
+    ], (
+        "Убедитесь, что страница по курсору `?after=` совпадает"
+        " со страницей `?page=2`."
+    )
+    back_page = get_page_posts(
+        user_client, f"/?before={cursor_page.previous_cursor}"
+    )
+    assert [post.id for post in back_page] == [
+        post.id for post in first_page
+    ], (
+        "Убедитесь, что переход по курсору `?before=` возвращает"
+        " на предыдущую страницу."
+    )
+    assert not back_page.has_previous()
+
+
+def test_cursor_pagination_in_category_and_profile(
+        user, user_client, published_category,
+        many_posts_with_published_locations
+):
+    for url in (
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    ):
+        first_page = get_page_posts(user_client, url)
+        cursor_page = get_page_posts(
+            user_client, f"{url}?after={first_page.next_cursor}"
+        )
+        assert len(cursor_page) == N_PER_PAGE
+        assert not set(post.id for post in cursor_page) & set(
+            post.id for post in first_page
+        ), f"Убедитесь, что на странице `{url}` курсор не повторяет посты."
+
+
+def test_broken_cursor_shows_first_page(
+        user_client, many_posts_with_published_locations
+):
+    from blog.utils import make_cursor
+
+    huge_id = make_cursor(timezone.now(), 10 ** 23)
+    for token in ("not-a-cursor", huge_id):
+        page_obj = get_page_posts(user_client, f"/?after={token}")
+        assert len(page_obj) == N_PER_PAGE, (
+            "Убедитесь, что битый токен курсора открывает первую страницу."
+        )
+        assert not page_obj.has_previous()
+    response = user_client.get(f"/api/posts/?after={huge_id}")
+    assert response.status_code == 200, (
+        "Убедитесь, что API не падает на токене с огромным id."
+    )
+
+
+def test_page_range_is_windowed(
+        mixer, user, user_client, published_category
+):
+    mixer.cycle(N_PER_PAGE * 12).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    page_obj = get_page_posts(user_client, "/?page=6")
+    ellipsis = page_obj.paginator.ELLIPSIS
+    assert page_obj.elided_page_range == [
+        1, ellipsis, 4, 5, 6, 7, 8, ellipsis, 12
+    ], (
+        "Убедитесь, что пагинатор выводит первую и последнюю страницы"
+        " и окно вокруг текущей."
+    )
+
+
+def test_feed_count_is_cached(
+        user_client, published_category, many_posts_with_published_locations
+):
+    url = f"/category/{published_category.slug}/"
+    get_page_posts(user_client, url)
+    with CaptureQueriesContext(connection) as context:
+        page_obj = get_page_posts(user_client, url)
+    assert not [
+        query for query in context.captured_queries
+        if "COUNT(*)" in query["sql"]
+    ], "Убедитесь, что число публикаций в ленте берётся из кэша."
+
+    post = many_posts_with_published_locations[0]
+    post.is_published = False
+    post.save()
+    page_obj = get_page_posts(user_client, url)
+    assert page_obj.paginator.count == len(
+        many_posts_with_published_locations
+    ) - 1, (
+        "Убедитесь, что снятие поста с публикации сбрасывает"
+        " закэшированное число публикаций в ленте."
+    )
@@ -0,0 +1,52 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_index_content(client):
+    response = client.get("/")
+    assert response.status_code == 200
+    return response.content.decode("utf-8")
+
+
+def test_post_card_rendered_from_cache(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    get_index_content(user_client)
+
+    type(post).objects.filter(pk=post.pk).update(title="Заголовок в обход")
+    assert "Заголовок в обход" not in get_index_content(user_client), (
+        "Убедитесь, что карточка поста в ленте берётся из кэша фрагментов."
+    )
+
+    post.refresh_from_db()
+    post.title = "Новый заголовок"
+    post.save()
+    assert "Новый заголовок" in get_index_content(user_client), (
+        "Убедитесь, что сохранение поста сбрасывает кэш его карточки."
+    )
+
+
+def test_post_card_tracks_related_changes(
+        mixer, user, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    get_index_content(user_client)
+
+    mixer.blend("blog.Comment", post=post, author=user)
+    assert "Комментарии (1)" in get_index_content(user_client), (
+        "Убедитесь, что новый комментарий обновляет счётчик в карточке поста."
+    )
+
+    post.location.name = "Новое место"
+    post.location.save()
+    assert "Новое место" in get_index_content(user_client), (
+        "Убедитесь, что изменение местоположения сбрасывает кэш карточки."
+    )
+
+    post.category.title = "Новая категория"
+    post.category.save()
+    assert "Новая категория" in get_index_content(user_client), (
+        "Убедитесь, что изменение категории сбрасывает кэш карточки."
+    )
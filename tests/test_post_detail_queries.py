@@ -0,0 +1,45 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post_with_comments(
+        mixer, user, another_user, post_with_published_location
+):
+    mixer.cycle(5).blend(
+        "blog.Comment",
+        post=post_with_published_location,
+        author=mixer.sequence(user, another_user),
+    )
+    return post_with_published_location
+
+
+def test_detail_queries_anonymous(
+        client, django_assert_num_queries, post_with_comments
+):
+    with django_assert_num_queries(2):
+        response = client.get(f"/posts/{post_with_comments.id}/")
+    assert response.status_code == 200
+
+
+def test_detail_queries_author(
+        user_client, django_assert_num_queries, post_with_comments
+):
+    # Сессия и пользователь, пост со связанными объектами, комментарии.
+    with django_assert_num_queries(4):
+        response = user_client.get(f"/posts/{post_with_comments.id}/")
+    assert response.status_code == 200
+
+
+def test_unpublished_post_visible_only_to_author(
+        user_client, another_user_client, django_assert_num_queries,
+        post_with_published_location
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    assert user_client.get(f"/posts/{post.id}/").status_code == 200
+    with django_assert_num_queries(3):
+        response = another_user_client.get(f"/posts/{post.id}/")
+    assert response.status_code == 404
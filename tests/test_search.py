@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.utils.http import urlencode
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def search_posts(mixer, user, published_category):
+    return {
+        "match": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Путешествие на Байкал", text="Лёд и нерпы.",
+        ),
+        "other": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Рецепт борща", text="Свекла, капуста и Байкальская вода.",
+        ),
+        "hidden": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Байкал зимой", is_published=False,
+        ),
+    }
+
+
+def found_ids(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что страница поиска загружается без ошибок."
+    )
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_respects_visibility(client, search_posts):
+    ids = found_ids(client, "байкал")
+    assert search_posts["match"].id in ids, (
+        "Убедитесь, что поиск находит опубликованный пост по заголовку."
+    )
+    assert search_posts["other"].id in ids, (
+        "Убедитесь, что последнее слово запроса ищется как префикс."
+    )
+    assert search_posts["hidden"].id not in ids, (
+        "Убедитесь, что поиск не показывает неопубликованные посты."
+    )
+    assert found_ids(client, '"нерпы (') == [search_posts["match"].id]
+    assert found_ids(client, "") == []
+
+
+def test_search_index_follows_changes(client, search_posts):
+    post = search_posts["match"]
+    post.text = "Теперь про Алтай."
+    post.save()
+    assert found_ids(client, "алтай") == [post.id], (
+        "Убедитесь, что индекс поиска обновляется при изменении поста."
+    )
+    assert post.id not in found_ids(client, "нерпы")
+    post.delete()
+    assert found_ids(client, "алтай") == []
+
+
+def test_search_pagination_keeps_query(
+        mixer, client, user, published_category
+):
+    mixer.cycle(15).blend(
+        "blog.Post", author=user, category=published_category,
+        title="Заметка о рыбалке",
+    )
+    response = client.get("/search/", {"q": "рыбалке"})
+    link = f'href="?{urlencode({"q": "рыбалке"})}&amp;page=2"'
+    assert link in response.content.decode(), (
+        "Убедитесь, что ссылки пагинатора поиска сохраняют запрос."
+    )
+
+
+def test_admin_search_and_rebuild(admin_client, search_posts):
+    call_command("rebuild_post_search")
+    response = admin_client.get("/admin/blog/post/", {"q": "байкал"})
+    assert response.status_code == HTTPStatus.OK
+    ids = {post.id for post in response.context["cl"].result_list}
+    assert ids == {post.id for post in search_posts.values()}, (
+        "Убедитесь, что поиск в админке идёт по полнотекстовому индексу."
+    )
+
+
+def test_search_orders_by_rank(mixer, client, user, published_category):
+    posts = [
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title=title, text=text,
+        )
+        for title, text in (
+            ("Заметка", "Один раз про омуль."),
+            ("Омуль", "Омуль, омуль и снова омуль."),
+        )
+    ]
+    assert found_ids(client, "омуль") == [posts[1].id, posts[0].id], (
+        "Убедитесь, что более релевантные посты выводятся первыми."
+    )
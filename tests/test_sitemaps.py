@@ -0,0 +1,119 @@
+import re
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog import sitemaps
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_locations(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f"Убедитесь, что карта сайта `{url}` загружается без ошибок."
+    )
+    content = b"".join(
+        response.streaming_content if response.streaming
+        else [response.content]
+    ).decode()
+    return response, re.findall(r"<loc>http://testserver(.*?)</loc>", content)
+
+
+def test_sitemap_covers_visible_pages(
+        monkeypatch, client, user, published_category,
+        many_posts_with_published_locations, future_posts
+):
+    monkeypatch.setattr(sitemaps, "SITEMAP_CHUNK_SIZE", 4)
+    response, chunks = get_locations(client, "/sitemap.xml")
+    assert response.streaming, (
+        "Убедитесь, что индекс карты сайта отдаётся потоком."
+    )
+    post_chunks = [url for url in chunks if "sitemap-posts" in url]
+    posts_count = len(many_posts_with_published_locations)
+    assert len(post_chunks) == -(-posts_count // 4)
+    locations = []
+    for chunk in chunks:
+        locations += get_locations(client, chunk.replace("&amp;", "&"))[1]
+    expected_posts = {
+        f"/posts/{post.id}/" for post in many_posts_with_published_locations
+    }
+    posts = [url for url in locations if url.startswith("/posts/")]
+    assert len(posts) == len(set(posts)) and set(posts) == expected_posts, (
+        "Убедитесь, что куски карты сайта вместе содержат каждую"
+        " опубликованную публикацию ровно один раз."
+    )
+    assert f"/category/{published_category.slug}/" in locations
+    assert f"/profile/{user.username}/" in locations
+
+
+def test_sitemap_chunks_bounded(
+        monkeypatch, mixer, client, user, published_category,
+        many_posts_with_published_locations
+):
+    monkeypatch.setattr(sitemaps, "SITEMAP_CHUNK_SIZE", 4)
+    chunks = [
+        url.replace("&amp;", "&")
+        for url in get_locations(client, "/sitemap.xml")[1]
+        if "sitemap-posts" in url
+    ]
+    assert all("end=" in url for url in chunks[:-1]), (
+        "Убедитесь, что ссылка на кусок карты сайта задает обе его границы."
+    )
+    earliest = min(
+        post.pub_date for post in many_posts_with_published_locations
+    )
+    new_post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=earliest - timedelta(minutes=1),
+    )
+    posts = []
+    for chunk in chunks:
+        posts += get_locations(client, chunk)[1]
+    expected_posts = {
+        f"/posts/{post.id}/"
+        for post in (*many_posts_with_published_locations, new_post)
+    }
+    assert len(posts) == len(set(posts)) and set(posts) == expected_posts, (
+        "Убедитесь, что публикация, добавленная после построения индекса,"
+        " не сдвигает строки между кусками карты сайта."
+    )
+
+
+def test_sitemap_chunks_cached(client, post_with_published_location):
+    for url in ("/sitemap.xml", "/sitemap-posts.xml"):
+        get_locations(client, url)
+        with CaptureQueriesContext(connection) as context:
+            get_locations(client, url)
+        assert not context.captured_queries, (
+            f"Убедитесь, что карта сайта `{url}` кэшируется."
+        )
+
+
+def test_only_indexed_chunks_cached(client, post_with_published_location):
+    get_locations(client, "/sitemap.xml")
+    url = "/sitemap-categories.xml?start=1&end=2"
+    get_locations(client, url)
+    with CaptureQueriesContext(connection) as context:
+        get_locations(client, url)
+    assert context.captured_queries, (
+        "Убедитесь, что кэшируются только куски карты сайта,"
+        " границы которых выдал индекс."
+    )
+
+
+def test_broken_sitemap_token(client):
+    for url in (
+        "/sitemap-posts.xml?start=bad",
+        "/sitemap-categories.xml?start=%C2%B2",
+    ):
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            f"Убедитесь, что карта сайта `{url}` с битым токеном"
+            " отвечает 404."
+        )
+    assert client.get("/sitemap-unknown.xml").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_urls(user, published_category):
+    urls = []
+    for kind in ("rss", "atom"):
+        urls += [
+            f"/{kind}/",
+            f"/category/{published_category.slug}/{kind}/",
+            f"/profile/{user.username}/{kind}/",
+        ]
+    return urls
+
+
+def get_feed(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f"Убедитесь, что лента `{url}` загружается без ошибок."
+    )
+    return response
+
+
+def test_feeds_show_published_posts(
+        client, feed_urls, post_with_published_location, future_posts,
+        posts_with_unpublished_category
+):
+    for url in feed_urls:
+        response = get_feed(client, url)
+        content = response.content.decode()
+        assert post_with_published_location.title in content, (
+            f"Убедитесь, что лента `{url}` содержит опубликованные посты."
+        )
+        for post in future_posts + posts_with_unpublished_category:
+            assert post.title not in content, (
+                f"Убедитесь, что лента `{url}` не содержит отложенных"
+                " и снятых с публикации постов."
+            )
+        assert "xml" in response["Content-Type"]
+
+
+def test_feeds_cached_and_conditional(
+        client, feed_urls, post_with_published_location
+):
+    for url in feed_urls:
+        etag = get_feed(client, url)["ETag"]
+        with CaptureQueriesContext(connection) as context:
+            get_feed(client, url)
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert not context.captured_queries, (
+            f"Убедитесь, что повторный запрос ленты `{url}` отдаётся"
+            " из кэша без запросов к базе данных."
+        )
+
+
+def test_feeds_regenerated_on_publish(
+        mixer, client, feed_urls, user, published_category,
+        post_with_published_location
+):
+    etags = {url: get_feed(client, url)["ETag"] for url in feed_urls}
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category
+    )
+    for url in feed_urls:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert post.title in response.content.decode(), (
+            f"Убедитесь, что новая публикация попадает в ленту `{url}`."
+        )
+
+
+def test_scheduled_post_appears_in_cached_feed(
+        mixer, client, user, published_category, time_shift
+):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(minutes=1),
+    )
+    assert post.title not in get_feed(client, "/rss/").content.decode()
+    time_shift(61)
+    assert post.title in get_feed(client, "/rss/").content.decode(), (
+        "Убедитесь, что закэшированная лента перестраивается,"
+        " когда наступает время отложенной публикации."
+    )
@@ -0,0 +1,65 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+RAW_TEXT = "<b>жирный</b>\nвторая строка"
+RENDERED_TEXT = "&lt;b&gt;жирный&lt;/b&gt;<br>вторая строка"
+
+
+def test_post_and_comment_store_rendered_html(
+        mixer, user, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = RAW_TEXT
+    post.save()
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    user_client.post(
+        f"/posts/{post.id}/edit_comment/{comment.id}/",
+        data={"text": RAW_TEXT},
+    )
+    for item in (post, comment):
+        item.refresh_from_db()
+        assert item.text_html == RENDERED_TEXT, (
+            "Убедитесь, что при сохранении текста в модели сохраняется"
+            " его экранированный HTML с переносами строк."
+        )
+    content = user_client.get(f"/posts/{post.id}/").content.decode()
+    assert content.count(RENDERED_TEXT) == 2
+
+
+def test_rebuild_text_html_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, text=RAW_TEXT)
+    type(post).objects.update(text=RAW_TEXT, text_html="")
+    post.comments.update(text_html="")
+
+    call_command("rebuild_text_html", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.text_html == RENDERED_TEXT
+    assert post.comments.get().text_html == RENDERED_TEXT, (
+        "Убедитесь, что команда `rebuild_text_html` заполняет HTML"
+        " у существующих комментариев."
+    )
+
+
+def test_rebuild_text_html_resets_cached_pages(
+        client, post_with_published_location, comment_to_a_post
+):
+    post = post_with_published_location
+    for url in ("/", f"/posts/{post.id}/"):
+        client.get(url)
+    type(post).objects.filter(pk=post.pk).update(text="Новое начало")
+    type(comment_to_a_post).objects.filter(pk=comment_to_a_post.pk).update(
+        text="Новый комментарий"
+    )
+    call_command("rebuild_text_html", stdout=StringIO())
+    assert "Новое начало" in client.get("/").content.decode(), (
+        "Убедитесь, что после `rebuild_text_html` карточки поста"
+        " не отдаются из кэша со старым HTML."
+    )
+    content = client.get(f"/posts/{post.id}/").content.decode()
+    assert "Новое начало" in content
+    assert "Новый комментарий" in content
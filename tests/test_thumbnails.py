@@ -0,0 +1,143 @@
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+import pytest
+from bs4 import BeautifulSoup
+from conftest import make_image
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post_with_photo(mixer, user, published_category, media_root):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, image=None
+    )
+    post.image.save("photo.jpg", make_image(800, 400), save=False)
+    post.save()
+    return post
+
+
+def test_generate_thumbnails(media_root):
+    from blog.images import generate_thumbnails, open_image, thumbnail_name
+    from blog.models import Post
+
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Camera"
+    name = Post.image.field.storage.save(
+        "post_images/photo.jpg", make_image(800, 400, exif)
+    )
+    with Post.image.field.storage.open(name) as file:
+        image = open_image(file)
+    assert generate_thumbnails(name, image) == [320, 400], (
+        "Убедитесь, что миниатюры не шире повернутого исходного фото."
+    )
+    for width in (320, 400):
+        for extension in ("webp", "jpg"):
+            path = media_root / thumbnail_name(name, width, extension)
+            with Image.open(path) as thumbnail:
+                assert thumbnail.width == width
+                assert not thumbnail.getexif(), (
+                    "Убедитесь, что в миниатюры не попадают данные EXIF."
+                )
+    with Image.open(media_root / thumbnail_name(name, 320, "jpg")) as image:
+        assert image.height == 640, (
+            "Убедитесь, что фото поворачивается по ориентации из EXIF."
+        )
+
+
+def test_thumbnails_scheduled_after_commit(
+    monkeypatch, post_with_photo, django_capture_on_commit_callbacks
+):
+    from blog import signals
+
+    scheduled = []
+    monkeypatch.setattr(signals, "schedule_thumbnails", scheduled.append)
+    post_with_photo.title = "Новый заголовок"
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_photo.save()
+    assert scheduled == []
+    post_with_photo.image.save("other.jpg", make_image(100, 100), save=False)
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_photo.save()
+    assert scheduled == [post_with_photo.image.name], (
+        "Убедитесь, что новое фото отправляется на обработку после коммита."
+    )
+    assert post_with_photo.thumbnails == ""
+
+
+def test_post_picture_markup(client, post_with_photo):
+    from blog.images import process_post_image
+
+    def get_picture():
+        content = client.get(f"/posts/{post_with_photo.id}/").content
+        soup = BeautifulSoup(content.decode("utf-8"), features="html.parser")
+        return soup.find("picture")
+
+    picture = get_picture()
+    assert picture.find("source") is None
+    assert picture.img["src"] == post_with_photo.image.url, (
+        "Убедитесь, что до готовности миниатюр выводится исходное фото."
+    )
+    process_post_image(post_with_photo.image.name)
+    picture = get_picture()
+    assert len(picture.find_all("img")) == 1
+    assert picture.source["type"] == "image/webp"
+    assert picture.source["srcset"].count("w,") == 2
+    assert picture.img["srcset"].endswith("-800.jpg 800w")
+    assert picture.img["src"].endswith("-640.jpg")
+    assert picture.img["loading"] == "lazy", (
+        "Убедитесь, что фото поста загружается лениво."
+    )
+    assert (picture.img["width"], picture.img["height"]) == ("800", "400")
+
+
+def test_post_form_stores_image_metadata(
+    user_client, post_with_published_location, media_root
+):
+    post = post_with_published_location
+    image = make_image(300, 200)
+    image.content_type = "image/jpeg"
+    data = {
+        "title": post.title,
+        "text": post.text,
+        "pub_date": post.pub_date.strftime("%Y-%m-%dT%H:%M"),
+        "location": post.location_id,
+        "category": post.category_id,
+        "image": image,
+    }
+    response = user_client.post(f"/posts/{post.id}/edit/", data)
+    assert response.status_code == HTTPStatus.FOUND
+    post.refresh_from_db()
+    assert (post.image_width, post.image_height) == (300, 200), (
+        "Убедитесь, что размеры фото сохраняются при сохранении формы поста."
+    )
+    assert post.image_placeholder.startswith("data:image/webp;base64,")
+    assert len(post.image_placeholder) < 1000, (
+        "Убедитесь, что заглушка фото занимает несколько сотен байт."
+    )
+    with mock.patch("PIL.Image.open") as image_open:
+        content = user_client.get(f"/posts/{post.id}/").content.decode()
+    image_open.assert_not_called()
+    assert 'width="300" height="200"' in content
+    assert post.image_placeholder in content
+
+
+def test_generate_thumbnails_all_regenerates(post_with_photo, media_root):
+    from django.core.management import call_command
+
+    from blog.images import process_post_image, thumbnail_name
+
+    name = post_with_photo.image.name
+    process_post_image(name)
+    thumbnail = media_root / thumbnail_name(name, 320, "jpg")
+    thumbnail.unlink()
+    call_command("generate_thumbnails", stdout=StringIO())
+    assert not thumbnail.exists()
+    call_command("generate_thumbnails", "--all", stdout=StringIO())
+    assert thumbnail.exists(), (
+        "Убедитесь, что generate_thumbnails --all пересоздает миниатюры."
+    )